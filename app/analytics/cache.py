@@ -0,0 +1,23 @@
+from ..cache import StaleWhileRevalidateCache
+from ..metrics import register_metrics
+import os
+
+ANALYTICS_SOFT_TTL_SECONDS = float(os.getenv("ANALYTICS_SOFT_TTL_SECONDS", "15"))
+ANALYTICS_HARD_TTL_SECONDS = float(os.getenv("ANALYTICS_HARD_TTL_SECONDS", "300"))
+
+# Served immediately while fresher than the hard TTL; refreshed in the background after the soft TTL
+analytics_cache = StaleWhileRevalidateCache(
+    soft_ttl=ANALYTICS_SOFT_TTL_SECONDS,
+    hard_ttl=ANALYTICS_HARD_TTL_SECONDS,
+    maxsize=1000
+)
+register_metrics("analytics_cache", analytics_cache.stats)
+
+
+def mentor_stats_key(mentor_id: str) -> tuple:
+    return ("mentor_stats", mentor_id)
+
+
+def invalidate_mentor_stats(mentor_id: str) -> None:
+    """Drop a mentor's cached stats after one of their approvals changed state"""
+    analytics_cache.invalidate(mentor_stats_key(mentor_id))
@@ -0,0 +1,43 @@
+from typing import Dict, Iterable, List, Mapping
+import math
+
+# Log-scale buckets: bucket i holds latencies in [GROWTH^i, GROWTH^(i+1)) seconds, so any
+# quantile is reported within about 5% (HDR-histogram style). Must match latency_bucket() in SQL.
+GROWTH = 1.1
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def bucket_for(seconds: float) -> int:
+    return max(0, math.floor(math.log(max(seconds, 1.0)) / math.log(GROWTH)))
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative latency of a bucket (its geometric midpoint)"""
+    return GROWTH ** (bucket + 0.5)
+
+
+def quantiles(buckets: Mapping[int, int], qs: Iterable[float] = LATENCY_QUANTILES) -> Dict[float, float]:
+    """Approximate latency quantiles from bucket counts"""
+    total = sum(buckets.values())
+    if total == 0:
+        return {q: 0.0 for q in qs}
+    ordered = sorted(buckets.items())
+    result = {}
+    for q in qs:
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for bucket, count in ordered:
+            seen += count
+            if seen >= rank:
+                result[q] = round(bucket_value(bucket), 1)
+                break
+    return result
+
+
+def merge_rows(rows: Iterable[Mapping]) -> Dict[str, Dict[int, int]]:
+    """Group mentor_latency_histograms rows into {mentor_id: {bucket: count}}"""
+    histograms: Dict[str, Dict[int, int]] = {}
+    for row in rows:
+        histogram = histograms.setdefault(row["mentor_id"], {})
+        histogram[row["bucket"]] = histogram.get(row["bucket"], 0) + row["count"]
+    return histograms
@@ -0,0 +1,79 @@
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, Optional
+from ..database import get_supabase
+from ..metrics import register_metrics
+from ..postgres import postgres
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "300"))
+
+
+class RollupScheduler:
+    """
+    Periodically runs refresh_analytics_rollups(), which brings the
+    approval_rollups and mentor_latency_rollups tables up to date from its
+    high-water mark, by at most 30 days per run. A run that fails is logged
+    and retried on the next tick.
+    """
+
+    def __init__(self, interval: float = ROLLUP_INTERVAL_SECONDS):
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.last_duration_ms: Optional[float] = None
+        self.high_water_mark: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run_once(self) -> None:
+        started = time.perf_counter()
+        try:
+            if postgres.enabled:
+                mark = await postgres.refresh_rollups()
+            else:
+                mark = await run_in_threadpool(self._refresh_through_rpc)
+        except Exception:
+            self.failures += 1
+            logger.exception("Analytics rollup refresh failed")
+            return
+        finally:
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.runs += 1
+        # None means another instance held the refresh lock
+        if mark is not None:
+            self.high_water_mark = str(mark)
+
+    @staticmethod
+    def _refresh_through_rpc() -> Any:
+        return get_supabase().rpc("refresh_analytics_rollups", {}).execute().data
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration_ms": self.last_duration_ms,
+            "high_water_mark": self.high_water_mark,
+        }
+
+
+rollup_scheduler = RollupScheduler()
+register_metrics("analytics_rollups", rollup_scheduler.stats)
@@ -1,111 +1,288 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
-from typing import Dict, Any
-from ..database import get_supabase
-from ..schemas import DashboardStats
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from datetime import date, timedelta
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from ..database import get_supabase, Client
+from ..schemas import (
+    DashboardStats, HeatmapResponse, HeatmapRow, ApprovalRollup, MentorLatencyRollup, MentorLatencyStats
+)
 from ..dependencies import get_current_admin, get_current_user
+from ..curriculum.progress import TOTAL_WEEKS, WEEKS_PER_BLOC, encode_mask
+from ..postgres import postgres
+from ..singleflight import single_flight
+from .cache import analytics_cache, mentor_stats_key
+from .latency import merge_rows, quantiles
+import asyncio
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+TIMESERIES_DEFAULT_DAYS = 90
+TIMESERIES_MAX_DAYS = 366
 
-@router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard_stats(
-    current_user = Depends(get_current_admin),
-    supabase: Client = Depends(get_supabase)
-):
-    """Get dashboard statistics (admin only)"""
-    # Get user counts
-    total_users = db.query(User).count()
-    mentees = db.query(User).filter(User.role == "mentee").count()
-    mentors = db.query(User).filter(User.role == "mentor").count()
-    parents = db.query(User).filter(User.role == "parent").count()
-    
-    # Get all mentees with their completed weeks
-    all_mentees = db.query(User).filter(User.role == "mentee").all()
-    
-    # Calculate total completed weeks
-    total_completed_weeks = 0
-    for mentee in all_mentees:
-        if mentee.completed_weeks:
-            total_completed_weeks += len(mentee.completed_weeks)
-    
-    # Calculate bloc completion
+# PostgREST caps responses at 1000 rows by default, so reads that can grow past it are paged
+PAGE_SIZE = 1000
+
+
+def _dashboard_from_counts(counts: Dict[str, Any]) -> DashboardStats:
+    """Build DashboardStats from per-role user counts and per-week completion counts"""
+    week_completions = counts["week_completions"]
     bloc_completion = [
         {"bloc": 1, "name": "Artistic Inclination", "completed": 0, "total": 12},
         {"bloc": 2, "name": "Auditory Talents", "completed": 0, "total": 12},
         {"bloc": 3, "name": "Sensory Intelligence", "completed": 0, "total": 12}
     ]
+    for week, completions in week_completions.items():
+        bloc_index = min((week - 1) // WEEKS_PER_BLOC, 2)
+        bloc_completion[bloc_index]["completed"] += completions
     
-    for mentee in all_mentees:
-        if mentee.completed_weeks:
-            for week in mentee.completed_weeks:
-                if week <= 12:
-                    bloc_completion[0]["completed"] += 1
-                elif week <= 24:
-                    bloc_completion[1]["completed"] += 1
-                else:
-                    bloc_completion[2]["completed"] += 1
-    
-    # Calculate weekly progress
-    weekly_progress = []
-    for week in range(1, 37):
-        completions = sum(1 for mentee in all_mentees 
-                         if mentee.completed_weeks and week in mentee.completed_weeks)
-        weekly_progress.append({"week": week, "completions": completions})
-    
-    # Calculate ratios and averages
-    mentor_mentee_ratio = mentees / mentors if mentors > 0 else 0
-    average_progress = round((total_completed_weeks / (mentees * 36)) * 100) if mentees > 0 else 0
-    
+    total_completed_weeks = sum(week_completions.values())
+    mentees, mentors = counts["mentees"], counts["mentors"]
     return DashboardStats(
-        total_users=total_users,
+        total_users=counts["total_users"],
         mentees=mentees,
         mentors=mentors,
-        parents=parents,
+        parents=counts["parents"],
         completed_weeks=total_completed_weeks,
         bloc_completion=bloc_completion,
-        weekly_progress=weekly_progress,
-        mentor_mentee_ratio=round(mentor_mentee_ratio, 2),
-        average_progress=average_progress
+        weekly_progress=[{"week": week, "completions": week_completions.get(week, 0)} for week in range(1, TOTAL_WEEKS + 1)],
+        mentor_mentee_ratio=round(mentees / mentors if mentors > 0 else 0, 2),
+        average_progress=round((total_completed_weeks / (mentees * TOTAL_WEEKS)) * 100) if mentees > 0 else 0
     )
 
 
+def count_users(supabase: Client, role: Optional[str] = None) -> int:
+    query = supabase.table("users").select("id", count="exact", head=True)
+    if role:
+        query = query.eq("role", role)
+    return query.execute().count or 0
+
+
+def fetch_week_completions(supabase: Client) -> Dict[int, int]:
+    """Mentees who completed each week, aggregated in the database (get_week_completions)"""
+    rows = supabase.rpc("get_week_completions", {}, get=True).execute().data
+    return {row["week"]: row["completions"] for row in rows}
+
+
+async def fetch_dashboard_counts(supabase: Client) -> Dict[str, Any]:
+    """User counts per role and completions per week through PostgREST, without reading user rows"""
+    total_users, mentees, mentors, parents, week_completions = await asyncio.gather(
+        run_in_threadpool(count_users, supabase),
+        run_in_threadpool(count_users, supabase, "mentee"),
+        run_in_threadpool(count_users, supabase, "mentor"),
+        run_in_threadpool(count_users, supabase, "parent"),
+        run_in_threadpool(fetch_week_completions, supabase)
+    )
+    return {
+        "total_users": total_users,
+        "mentees": mentees,
+        "mentors": mentors,
+        "parents": parents,
+        "week_completions": week_completions
+    }
+
+
+async def load_dashboard_counts(supabase: Client) -> Dict[str, Any]:
+    """Dashboard counts from the configured data backend"""
+    if postgres.enabled:
+        return await postgres.fetch_dashboard_counts()
+    return await fetch_dashboard_counts(supabase)
+
+
+async def _compute_dashboard(supabase: Client) -> DashboardStats:
+    # Admins opening the dashboard together share one computation
+    counts = await single_flight.do("analytics:dashboard", lambda: load_dashboard_counts(supabase))
+    return _dashboard_from_counts(counts)
+
+
+def fetch_mentor_stats(supabase: Client, mentor_id: str) -> Dict[str, int]:
+    """Mentee, approval and completed-week counts of one mentor in one aggregate RPC"""
+    return supabase.rpc("get_mentor_stats", {"target_mentor_id": mentor_id}, get=True).execute().data[0]
+
+
+async def load_mentor_stats(supabase: Client, mentor_id: str) -> Dict[str, int]:
+    """Mentor stats from the configured data backend, off the event loop"""
+    if postgres.enabled:
+        return await postgres.fetch_mentor_stats(mentor_id)
+    return await run_in_threadpool(fetch_mentor_stats, supabase, mentor_id)
+
+
+def fetch_all_pages(build_query: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Every row of a query, read PAGE_SIZE rows at a time; the query must be totally ordered"""
+    rows: List[Dict[str, Any]] = []
+    while True:
+        page = build_query().range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def fetch_heatmap_rows(supabase: Client, mentor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Every mentee's completed-weeks mask through PostgREST, optionally of one mentor only"""
+    def build_query():
+        query = supabase.table("users").select("id, name, mentee_number, completed_weeks_mask").eq("role", "mentee")
+        if mentor_id:
+            query = query.eq("mentor_id", mentor_id)
+        return query.order("name").order("id")
+    return fetch_all_pages(build_query)
+
+
+def fetch_latency_histograms(supabase: Client, mentor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Latency histogram buckets, one row per mentor and bucket, optionally of one mentor only"""
+    def build_query():
+        query = supabase.table("mentor_latency_histograms").select("mentor_id, bucket, count")
+        if mentor_id:
+            query = query.eq("mentor_id", mentor_id)
+        return query.order("mentor_id").order("bucket")
+    return fetch_all_pages(build_query)
+
+
+async def _compute_heatmap(supabase: Client, mentor_id: Optional[str]) -> HeatmapResponse:
+    if postgres.enabled:
+        rows = await postgres.fetch_heatmap_rows(mentor_id)
+    else:
+        rows = await run_in_threadpool(fetch_heatmap_rows, supabase, mentor_id)
+    return HeatmapResponse(
+        total_weeks=TOTAL_WEEKS,
+        mentees=[
+            HeatmapRow(
+                id=row["id"],
+                name=row["name"],
+                mentee_number=row.get("mentee_number"),
+                weeks=encode_mask(row.get("completed_weeks_mask") or 0)
+            )
+            for row in rows
+        ]
+    )
+
+
+@router.get("/dashboard", response_model=DashboardStats)
+async def get_dashboard_stats(
+    current_user = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get dashboard statistics (admin only); may be a few seconds old"""
+    return await analytics_cache.get("dashboard", lambda: _compute_dashboard(supabase))
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_progress_heatmap(
+    mentor_id: Optional[str] = Query(None, description="Only mentees of this mentor"),
+    current_user = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get the mentee x week completion matrix, one packed bitmask per mentee (admin only)"""
+    return await analytics_cache.get(("heatmap", mentor_id), lambda: _compute_heatmap(supabase, mentor_id))
+
+
+@router.post("/refresh", response_model=DashboardStats)
+async def refresh_analytics(
+    current_user = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Recompute dashboard statistics now and drop cached mentor stats (admin only)"""
+    analytics_cache.clear()
+    return await analytics_cache.refresh("dashboard", lambda: _compute_dashboard(supabase))
+
+
 @router.get("/mentor/stats")
 async def get_mentor_stats(
     current_user = Depends(get_current_user),
     supabase: Client = Depends(get_supabase)
 ):
     """Get statistics for current mentor"""
-    if current_user.role != "mentor":
+    if current_user.get("role") != "mentor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only mentors can access this endpoint"
         )
     
-    assigned_mentees = db.query(User).filter(
-        User.role == "mentee",
-        User.mentor_id == current_user.id
-    ).all()
-    
-    pending_approvals = db.query(WeekApproval).filter(
-        WeekApproval.mentor_id == current_user.id,
-        WeekApproval.status == "pending"
-    ).count()
+    mentor_id = current_user.get("id")
+    return await analytics_cache.get(mentor_stats_key(mentor_id), lambda: load_mentor_stats(supabase, mentor_id))
+
+
+@router.get("/mentor/latency", response_model=List[MentorLatencyStats])
+async def get_mentor_latency(
+    mentor_id: Optional[str] = Query(None, description="Admins only; defaults to every mentor"),
+    current_user = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get p50/p90/p99 time from submission to approve/reject, per mentor"""
+    role = current_user.get("role")
+    if role == "mentor":
+        mentor_id = current_user.get("id")
+    elif role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only mentors and admins can access this endpoint"
+        )
     
-    completed_approvals = db.query(WeekApproval).filter(
-        WeekApproval.mentor_id == current_user.id,
-        WeekApproval.status == "approved"
-    ).count()
+    # Reads the pre-aggregated histogram buckets, never week_approvals itself
+    rows = await run_in_threadpool(fetch_latency_histograms, supabase, mentor_id)
     
-    total_completed_weeks = sum(
-        len(mentee.completed_weeks) if mentee.completed_weeks else 0 
-        for mentee in assigned_mentees
+    result = []
+    for histogram_mentor_id, buckets in sorted(merge_rows(rows).items()):
+        latency = quantiles(buckets)
+        result.append(MentorLatencyStats(
+            mentor_id=histogram_mentor_id,
+            decisions=sum(buckets.values()),
+            p50_seconds=latency[0.5],
+            p90_seconds=latency[0.9],
+            p99_seconds=latency[0.99]
+        ))
+    return result
+
+
+def _rollup_window(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=TIMESERIES_DEFAULT_DAYS)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if (end - start).days > TIMESERIES_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Time range must not exceed {TIMESERIES_MAX_DAYS} days"
+        )
+    return start, end
+
+
+def _rollup_query(supabase: Client, table: str, period: str, start: date, end: date):
+    return supabase.table(table).select("*").eq("period", period) \
+        .gte("period_start", start.isoformat()).lte("period_start", end.isoformat())
+
+
+@router.get("/timeseries/approvals", response_model=List[ApprovalRollup])
+async def get_approval_timeseries(
+    period: str = Query("day", pattern="^(day|week)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Approvals submitted, approved and rejected and active mentees per day or week (admin only)"""
+    start, end = _rollup_window(start, end)
+    return await run_in_threadpool(
+        fetch_all_pages, lambda: _rollup_query(supabase, "approval_rollups", period, start, end).order("period_start")
     )
-    
-    return {
-        "assigned_mentees": len(assigned_mentees),
-        "pending_approvals": pending_approvals,
-        "completed_approvals": completed_approvals,
-        "total_completed_weeks": total_completed_weeks
-    }
 
+
+@router.get("/timeseries/mentor-latency", response_model=List[MentorLatencyRollup])
+async def get_mentor_latency_timeseries(
+    period: str = Query("day", pattern="^(day|week)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    mentor_id: Optional[str] = None,
+    current_user = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Decisions and median submission-to-decision time per mentor per day or week (admin only)"""
+    start, end = _rollup_window(start, end)
+    
+    def build_query():
+        query = _rollup_query(supabase, "mentor_latency_rollups", period, start, end)
+        if mentor_id:
+            query = query.eq("mentor_id", mentor_id)
+        return query.order("period_start").order("mentor_id")
+    return await run_in_threadpool(fetch_all_pages, build_query)
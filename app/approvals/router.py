@@ -1,16 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any
 from typing import List
 from datetime import datetime
-from ..database import get_supabase
+from ..database import get_supabase, Client
 from ..schemas import WeekApprovalCreate, WeekApprovalUpdate, WeekApprovalResponse
 from ..dependencies import get_current_user, get_current_mentor, get_current_mentee
+from ..postgres import postgres
+from ..analytics.cache import invalidate_mentor_stats
+from ..curriculum.progress import add_week, has_week
 import uuid
 
 router = APIRouter(prefix="/approvals", tags=["approvals"])
 
 
+def _raise_not_approvable(approval: Dict[str, Any], current_user: Dict[str, Any]) -> None:
+    """Raise the error explaining why an approval could not be approved"""
+    if not approval:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Approval not found"
+        )
+    if approval["mentor_id"] != current_user.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only approve your own mentees' weeks"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Approval is not pending"
+    )
+
+
 @router.post("/", response_model=WeekApprovalResponse, status_code=status.HTTP_201_CREATED)
 async def create_week_approval(
     approval_data: WeekApprovalCreate,
@@ -19,52 +40,54 @@ async def create_week_approval(
 ):
     """Submit a week for approval (mentee only)"""
     # Verify mentee owns this approval
-    if current_user.id != approval_data.mentee_id:
+    if current_user.get("id") != approval_data.mentee_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only submit approvals for yourself"
         )
     
     # Check if mentee exists and has a mentor
-    mentee = db.query(User).filter(User.id == approval_data.mentee_id).first()
-    if not mentee or mentee.role != "mentee":
+    mentee_response = await run_in_threadpool(
+        supabase.table("users").select("id, role, mentor_id").eq("id", approval_data.mentee_id).execute
+    )
+    if not mentee_response.data or mentee_response.data[0].get("role") != "mentee":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Mentee not found"
         )
     
-    if not mentee.mentor_id:
+    mentee = mentee_response.data[0]
+    if not mentee.get("mentor_id"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mentee has no assigned mentor"
         )
     
     # Check if approval already exists for this week
-    existing = db.query(WeekApproval).filter(
-        WeekApproval.mentee_id == approval_data.mentee_id,
-        WeekApproval.week_number == approval_data.week_number
-    ).first()
-    
-    if existing:
+    existing_response = await run_in_threadpool(
+        supabase.table("week_approvals").select("id")
+        .eq("mentee_id", approval_data.mentee_id).eq("week_number", approval_data.week_number)
+        .limit(1).execute
+    )
+    if existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Approval for week {approval_data.week_number} already exists"
         )
     
-    new_approval = WeekApproval(
-        id=str(uuid.uuid4()),
-        mentee_id=approval_data.mentee_id,
-        week_number=approval_data.week_number,
-        mentor_id=mentee.mentor_id,
-        status="pending",
-        mentee_comment=approval_data.mentee_comment,
-        mentee_comment_at=datetime.utcnow() if approval_data.mentee_comment else None
-    )
+    new_approval = {
+        "id": str(uuid.uuid4()),
+        "mentee_id": approval_data.mentee_id,
+        "week_number": approval_data.week_number,
+        "mentor_id": mentee["mentor_id"],
+        "status": "pending",
+        "mentee_comment": approval_data.mentee_comment,
+        "mentee_comment_at": datetime.utcnow().isoformat() if approval_data.mentee_comment else None
+    }
     
-    db.add(new_approval)
-    db.commit()
-    db.refresh(new_approval)
-    return WeekApprovalResponse.from_orm(new_approval)
+    response = await run_in_threadpool(supabase.table("week_approvals").insert(new_approval).execute)
+    invalidate_mentor_stats(new_approval["mentor_id"])
+    return WeekApprovalResponse.model_validate(response.data[0])
 
 
 @router.get("/", response_model=List[WeekApprovalResponse])
@@ -149,6 +172,13 @@ async def approve_week(
     supabase: Client = Depends(get_supabase)
 ):
     """Approve a week (mentor only)"""
+    if postgres.enabled:
+        approved = await postgres.approve_week(approval_id, current_user.get("id"), approval_update.mentor_feedback)
+        if approved is None:
+            _raise_not_approvable(await postgres.fetch_approval(approval_id), current_user)
+        invalidate_mentor_stats(approved["mentor_id"])
+        return WeekApprovalResponse.model_validate(approved)
+    
     approval = db.query(WeekApproval).filter(WeekApproval.id == approval_id).first()
     if not approval:
         raise HTTPException(
@@ -175,14 +205,14 @@ async def approve_week(
     # Update mentee's completed weeks and current week
     mentee = db.query(User).filter(User.id == approval.mentee_id).first()
     if mentee:
-        if mentee.completed_weeks is None:
-            mentee.completed_weeks = []
-        if approval.week_number not in mentee.completed_weeks:
-            mentee.completed_weeks.append(approval.week_number)
+        if not has_week(mentee.completed_weeks_mask or 0, approval.week_number):
+            mentee.completed_weeks = (mentee.completed_weeks or []) + [approval.week_number]
+            mentee.completed_weeks_mask = add_week(mentee.completed_weeks_mask or 0, approval.week_number)
         mentee.current_week = max(mentee.current_week or 1, approval.week_number + 1)
     
     db.commit()
     db.refresh(approval)
+    invalidate_mentor_stats(approval.mentor_id)
     return WeekApprovalResponse.from_orm(approval)
 
 
@@ -194,23 +224,26 @@ async def reject_week(
     supabase: Client = Depends(get_supabase)
 ):
     """Reject a week (mentor only)"""
-    approval = db.query(WeekApproval).filter(WeekApproval.id == approval_id).first()
-    if not approval:
+    response = await run_in_threadpool(
+        supabase.table("week_approvals").select("id, mentor_id").eq("id", approval_id).execute
+    )
+    if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Approval not found"
         )
     
-    if approval.mentor_id != current_user.id:
+    approval = response.data[0]
+    if approval["mentor_id"] != current_user.get("id"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only reject your own mentees' weeks"
         )
     
-    approval.status = "rejected"
-    approval.mentor_feedback = approval_update.mentor_feedback
-    
-    db.commit()
-    db.refresh(approval)
-    return WeekApprovalResponse.from_orm(approval)
-
+    response = await run_in_threadpool(
+        supabase.table("week_approvals")
+        .update({"status": "rejected", "mentor_feedback": approval_update.mentor_feedback})
+        .eq("id", approval_id).execute
+    )
+    invalidate_mentor_stats(approval["mentor_id"])
+    return WeekApprovalResponse.model_validate(response.data[0])
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from typing import Optional, Tuple
+import math
+import os
+import time
+
+MAX_TRACKED_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+def parse_limit(value: str) -> Tuple[int, float]:
+    """Parse a "<requests>/<seconds>" limit such as "5/60" """
+    requests, seconds = value.split("/", 1)
+    requests, seconds = int(requests), float(seconds)
+    if requests < 1 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return requests, seconds
+
+
+class TokenBucket:
+    """
+    Token buckets keyed by string, each stored as a (tokens, updated_at) tuple.
+
+    Buckets are kept in last-use order. A bucket idle for a whole period has
+    refilled completely and behaves like a new one, so it is dropped; the
+    least recently used bucket is also dropped once max_keys is reached.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int = MAX_TRACKED_KEYS):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def consume(self, key: str) -> float:
+        """Take one token; returns 0 if allowed, otherwise seconds until one is available"""
+        now = time.monotonic()
+        self._evict(now)
+        tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self.period and len(self._buckets) < self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+
+class EndpointRateLimit:
+    """
+    Per-IP and per-email limits for one endpoint, configured through
+    RATE_LIMIT_<NAME>_IP and RATE_LIMIT_<NAME>_EMAIL ("<requests>/<seconds>").
+
+    The client IP is taken from the ASGI scope; run uvicorn with
+    --forwarded-allow-ips behind a proxy so it reflects X-Forwarded-For.
+    """
+
+    def __init__(self, name: str, ip_limit: str, email_limit: str):
+        self.name = name
+        self.by_ip = TokenBucket(*parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}_IP", ip_limit)))
+        self.by_email = TokenBucket(*parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}_EMAIL", email_limit)))
+
+    def check(self, request: Request, email: Optional[str] = None) -> None:
+        """Raise 429 if the caller is over the limit; call before any hashing"""
+        client_ip = request.client.host if request.client else "unknown"
+        retry_after = self.by_ip.consume(client_ip)
+        if not retry_after and email:
+            retry_after = self.by_email.consume(email.lower())
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+
+login_rate_limit = EndpointRateLimit("login", ip_limit="20/60", email_limit="5/60")
+register_rate_limit = EndpointRateLimit("register", ip_limit="10/600", email_limit="3/600")
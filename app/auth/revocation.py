@@ -0,0 +1,56 @@
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class RevocationSet:
+    """
+    In-memory set of revoked tokens.
+
+    Single tokens are revoked by jti (logout, refresh rotation); all tokens of
+    a user issued before a cutoff are revoked at once (password change,
+    deletion). Every entry is only needed until the tokens it covers expire,
+    so entries are kept in a heap ordered by that time and dropped lazily.
+    State is per process, which matches the single worker we deploy.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, float] = {}
+        self._users: Dict[str, Tuple[float, float]] = {}
+        self._expiry: List[Tuple[float, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._users)
+
+    def revoke_token(self, jti: str, expires_at: float) -> None:
+        """Revoke one token until its own expiry (a Unix timestamp)"""
+        if expires_at <= time.time():
+            return
+        self._tokens[jti] = expires_at
+        heapq.heappush(self._expiry, (expires_at, "token", jti))
+
+    def revoke_user(self, user_id: str, max_token_lifetime: float) -> None:
+        """Revoke every token of a user issued up to now"""
+        now = time.time()
+        forget_at = now + max_token_lifetime
+        self._users[user_id] = (now, forget_at)
+        heapq.heappush(self._expiry, (forget_at, "user", user_id))
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        self._purge(time.time())
+        if claims.get("jti") in self._tokens:
+            return True
+        user_entry: Optional[Tuple[float, float]] = self._users.get(claims.get("sub"))
+        return user_entry is not None and claims.get("iat", 0) <= user_entry[0]
+
+    def _purge(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            forget_at, kind, key = heapq.heappop(self._expiry)
+            # Skip heap entries superseded by a later revocation of the same key
+            if kind == "token" and self._tokens.get(key) == forget_at:
+                del self._tokens[key]
+            elif kind == "user" and self._users.get(key, (None, None))[1] == forget_at:
+                del self._users[key]
+
+
+revoked_tokens = RevocationSet()
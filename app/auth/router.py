@@ -1,27 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from datetime import timedelta
-from ..database import get_supabase
-from supabase import Client
-from ..schemas import RegisterRequest, LoginRequest, LoginResponse, UserResponse, AdminCreateRequest
-from ..dependencies import get_current_user
-from .utils import verify_password, create_access_token, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from ..database import get_supabase, Client
+from ..schemas import (
+    RegisterRequest, LoginRequest, LoginResponse, UserResponse, AdminCreateRequest,
+    RefreshRequest, LogoutRequest, ChangePasswordRequest
+)
+from ..dependencies import get_current_user, decode_token
+from .utils import (
+    verify_password_async, create_access_token, create_refresh_token, get_password_hash_async,
+    token_claims_for, MAX_TOKEN_LIFETIME_SECONDS
+)
+from .rate_limit import login_rate_limit, register_rate_limit
+from .revocation import revoked_tokens
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# Logout must also work with an already expired or missing token
+optional_security = HTTPBearer(auto_error=False)
+
+
+def _login_response(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Issue a fresh access/refresh token pair for a user"""
+    return {
+        "user": UserResponse.model_validate(user),
+        "token": create_access_token(data=token_claims_for(user)),
+        "refresh_token": create_refresh_token(data={"sub": user["id"]})
+    }
+
 
 @router.post("/create-admin", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
-async def create_first_admin(admin_data: AdminCreateRequest, supabase: Client = Depends(get_supabase)):
+async def create_first_admin(admin_data: AdminCreateRequest, request: Request, supabase: Client = Depends(get_supabase)):
     """Create the first admin user (only works if no admin exists)"""
-    existing_admin_response = supabase.table("users").select("*").eq("role", "admin").execute()
+    register_rate_limit.check(request, admin_data.email)
+    
+    existing_admin_response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "admin").execute)
     if existing_admin_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="An admin user already exists. Use admin endpoints to create additional admins."
         )
     
-    existing_user_response = supabase.table("users").select("*").eq("email", admin_data.email).execute()
+    existing_user_response = await run_in_threadpool(supabase.table("users").select("*").eq("email", admin_data.email).execute)
     if existing_user_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -32,35 +54,28 @@ async def create_first_admin(admin_data: AdminCreateRequest, supabase: Client =
         "id": str(uuid.uuid4()),
         "name": admin_data.name,
         "email": admin_data.email,
-        "password": get_password_hash(admin_data.password),
+        "password": await get_password_hash_async(admin_data.password),
         "role": "admin"
     }
     
-    response = supabase.table("users").insert(admin_data_dict).execute()
+    response = await run_in_threadpool(supabase.table("users").insert(admin_data_dict).execute)
     admin = response.data[0]
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": admin["id"], "role": admin["role"]},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "user": UserResponse.model_validate(admin),
-        "token": access_token
-    }
+    return _login_response(admin)
 
 
 @router.post("/register", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
-async def register(register_data: RegisterRequest, supabase: Client = Depends(get_supabase)):
+async def register(register_data: RegisterRequest, request: Request, supabase: Client = Depends(get_supabase)):
     """Register a new user"""
+    register_rate_limit.check(request, register_data.email)
+    
     if register_data.role not in ["mentee", "mentor", "parent"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid role. Must be 'mentee', 'mentor', or 'parent'"
         )
     
-    existing_user_response = supabase.table("users").select("*").eq("email", register_data.email).execute()
+    existing_user_response = await run_in_threadpool(supabase.table("users").select("*").eq("email", register_data.email).execute)
     if existing_user_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -71,7 +86,7 @@ async def register(register_data: RegisterRequest, supabase: Client = Depends(ge
     membership_number = None
     
     if register_data.role == "mentee":
-        mentees_response = supabase.table("users").select("mentee_number").eq("role", "mentee").execute()
+        mentees_response = await run_in_threadpool(supabase.table("users").select("mentee_number").eq("role", "mentee").execute)
         if mentees_response.data:
             numbers = [int(m["mentee_number"].replace("MN", "")) for m in mentees_response.data if m.get("mentee_number") and m["mentee_number"] and m["mentee_number"].startswith("MN")]
             next_num = max(numbers) + 1 if numbers else 1
@@ -79,7 +94,7 @@ async def register(register_data: RegisterRequest, supabase: Client = Depends(ge
             next_num = 1
         mentee_number = f"MN{str(next_num).zfill(3)}"
     elif register_data.role == "mentor":
-        mentors_response = supabase.table("users").select("membership_number").eq("role", "mentor").execute()
+        mentors_response = await run_in_threadpool(supabase.table("users").select("membership_number").eq("role", "mentor").execute)
         if mentors_response.data:
             numbers = [int(m["membership_number"].replace("MEM", "")) for m in mentors_response.data if m.get("membership_number") and m["membership_number"] and m["membership_number"].startswith("MEM")]
             next_num = max(numbers) + 1 if numbers else 1
@@ -91,7 +106,7 @@ async def register(register_data: RegisterRequest, supabase: Client = Depends(ge
         "id": str(uuid.uuid4()),
         "name": register_data.name,
         "email": register_data.email,
-        "password": get_password_hash(register_data.password),
+        "password": await get_password_hash_async(register_data.password),
         "role": register_data.role,
         "profile_picture": register_data.profile_picture,
         "mentee_number": mentee_number,
@@ -105,25 +120,18 @@ async def register(register_data: RegisterRequest, supabase: Client = Depends(ge
         "children": [] if register_data.role == "parent" else None
     }
     
-    response = supabase.table("users").insert(user_data).execute()
+    response = await run_in_threadpool(supabase.table("users").insert(user_data).execute)
     new_user = response.data[0]
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": new_user["id"], "role": new_user["role"]},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "user": UserResponse.model_validate(new_user),
-        "token": access_token
-    }
+    return _login_response(new_user)
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, supabase: Client = Depends(get_supabase)):
+async def login(login_data: LoginRequest, request: Request, supabase: Client = Depends(get_supabase)):
     """Authenticate user and return JWT token"""
-    response = supabase.table("users").select("*").eq("email", login_data.email).execute()
+    login_rate_limit.check(request, login_data.email)
+    
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("email", login_data.email).execute)
     
     if not response.data:
         raise HTTPException(
@@ -133,32 +141,94 @@ async def login(login_data: LoginRequest, supabase: Client = Depends(get_supabas
     
     user = response.data[0]
     
-    if not verify_password(login_data.password, user["password"]):
+    if not await verify_password_async(login_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["id"], "role": user["role"]},
-        expires_delta=access_token_expires
-    )
+    return _login_response(user)
+
+
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh_tokens(refresh_data: RefreshRequest, supabase: Client = Depends(get_supabase)):
+    """Exchange a refresh token for a new token pair (the used refresh token is revoked)"""
+    claims = decode_token(refresh_data.refresh_token, token_type="refresh")
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
     
-    return {
-        "user": UserResponse.model_validate(user),
-        "token": access_token
-    }
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", claims["sub"]).execute)
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    revoked_tokens.revoke_token(claims["jti"], claims["exp"])
+    return _login_response(response.data[0])
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: Dict[str, Any] = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get current authenticated user information"""
-    return UserResponse.model_validate(current_user)
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", current_user["id"]).execute)
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return UserResponse.model_validate(response.data[0])
+
+
+@router.post("/change-password", response_model=LoginResponse)
+async def change_password(
+    password_data: ChangePasswordRequest,
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Change the current user's password and revoke all of their existing tokens"""
+    login_rate_limit.check(request, current_user.get("email"))
+    
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", current_user["id"]).execute)
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user = response.data[0]
+    if not await verify_password_async(password_data.current_password, user["password"]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
+        )
+    
+    new_password_hash = await get_password_hash_async(password_data.new_password)
+    await run_in_threadpool(supabase.table("users").update({"password": new_password_hash}).eq("id", user["id"]).execute)
+    revoked_tokens.revoke_user(user["id"], MAX_TOKEN_LIFETIME_SECONDS)
+    return _login_response(user)
 
 
 @router.post("/logout")
-async def logout():
-    """Logout user (client should discard token)"""
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Logout user by revoking the access token and, if given, the refresh token"""
+    claims = decode_token(credentials.credentials) if credentials else None
+    if claims:
+        revoked_tokens.revoke_token(claims["jti"], claims["exp"])
+    
+    if logout_data and logout_data.refresh_token:
+        refresh_claims = decode_token(logout_data.refresh_token, token_type="refresh")
+        if refresh_claims and (claims is None or refresh_claims["sub"] == claims["sub"]):
+            revoked_tokens.revoke_token(refresh_claims["jti"], refresh_claims["exp"])
+    
     return {"message": "Successfully logged out"}
-
@@ -1,33 +1,93 @@
-from passlib.context import CryptContext
 from jose import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+import asyncio
 import os
+import time
+import uuid
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 60  # 30 hours
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+# Longest time any token stays valid; user-wide revocations must outlive it
+MAX_TOKEN_LIFETIME_SECONDS = max(ACCESS_TOKEN_EXPIRE_MINUTES * 60, REFRESH_TOKEN_EXPIRE_DAYS * 86400)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+_pwd_context = None
+
+# bcrypt gets its own small pool so it never blocks the event loop or the default threadpool
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_queue_depth = 0
+
+
+def get_pwd_context():
+    """Password hashing context, created on first use to keep passlib out of startup"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
-def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
-    """Create a JWT access token"""
+def hash_queue_depth() -> int:
+    """Number of password hashing operations running or waiting for a worker"""
+    return _hash_queue_depth
+
+
+async def _run_hashing(func: Callable, *args) -> Any:
+    global _hash_queue_depth
+    _hash_queue_depth += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_queue_depth -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool"""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await _run_hashing(get_password_hash, password)
+
+
+def _encode_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
+    """Encode a JWT with a unique jti and a sub-second iat (used for revocation)"""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode.update({
+        "exp": datetime.utcnow() + expires_delta,
+        "iat": time.time(),
+        "jti": uuid.uuid4().hex,
+        "type": token_type
+    })
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
+    """Create a short-lived JWT access token"""
+    return _encode_token(data, "access", expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+def create_refresh_token(data: dict, expires_delta: timedelta = None) -> str:
+    """Create a long-lived JWT refresh token (only accepted by /auth/refresh)"""
+    return _encode_token(data, "refresh", expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
 
+def token_claims_for(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Claims embedded in tokens so requests can be authenticated without a DB lookup"""
+    return {"sub": user["id"], "role": user["role"], "name": user["name"], "email": user["email"]}
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Small bounded in-process cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            # Evict the least recently used entry
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Async cache that answers from the last computed value.
+
+    Values younger than soft_ttl are served as is. Older ones are still
+    served immediately while a background task recomputes them, until
+    hard_ttl, after which callers wait for a fresh value. Concurrent loads
+    of a key are coalesced.
+    """
+
+    def __init__(self, soft_ttl: float, hard_ttl: float, maxsize: int = 1024):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Keyed by (key, version), so no stats: every invalidation would add a key
+        self._flight = SingleFlight(track_stats=False)
+        self._background: Set[asyncio.Task] = set()
+        # Bumped on invalidation so loads started before it do not store their result
+        self._versions: Counter = Counter()
+        self._epoch = 0
+        self.results: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            computed_at, value = entry
+            age = time.monotonic() - computed_at
+            if age < self.soft_ttl:
+                self.results["fresh"] += 1
+                return value
+            if age < self.hard_ttl:
+                self.results["stale"] += 1
+                self._revalidate(key, load)
+                return value
+        self.results["miss"] += 1
+        return await self.refresh(key, load)
+
+    async def refresh(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Recompute a value now and store it"""
+        version = (self._epoch, self._versions[key])
+        # Loads are only shared within a version: callers after an invalidation never join an older load
+        return await self._flight.do((key, version), lambda: self._load(key, load, version))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._versions[key] += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._epoch += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._data), **self.results}
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]], version: tuple) -> Any:
+        value = await load()
+        if version != (self._epoch, self._versions[key]):
+            return value
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def _revalidate(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        task = asyncio.create_task(self.refresh(key, load))
+        # Keep a reference until done; failures keep the stale value and are only logged
+        self._background.add(task)
+        task.add_done_callback(self._revalidated)
+
+    def _revalidated(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.results["refresh_failed"] += 1
+            logger.warning("Background refresh failed: %r", task.exception())
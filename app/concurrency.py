@@ -0,0 +1,145 @@
+from typing import Any, Dict, Optional
+from .metrics import register_metrics
+import json
+import os
+import time
+
+# Route classes: list endpoints and aggregates are limited separately from cheap lookups
+EXPENSIVE_PREFIXES = ("/analytics",)
+EXPENSIVE_PATHS = {
+    "/users", "/users/", "/users/mentees", "/users/mentors", "/users/parents", "/users/search",
+    "/users/parent/overview",
+    "/messages", "/messages/", "/messages/search", "/messages/conversations", "/approvals", "/approvals/",
+}
+# Per-user fan-out reads, matched by suffix under /users/{user_id}
+EXPENSIVE_USER_SUFFIXES = ("/timeline",)
+# Responses that signal downstream overload (e.g. database budget exceeded), not application bugs
+OVERLOAD_STATUS_CODES = {503, 504}
+# Never limited, so probes and scrapes still answer under load
+EXEMPT_PREFIXES = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit adapted from observed latency (additive increase,
+    multiplicative decrease).
+
+    Every response within the latency target raises the limit by 1/limit,
+    about +1 per limit's worth of requests; a slow or failed response
+    multiplies it by backoff, at most once per target interval so a burst
+    of slow responses does not collapse it. Requests over the limit are
+    rejected instead of queued.
+    """
+
+    def __init__(self, name: str, initial: int, max_limit: int, target_ms: float,
+                 min_limit: int = 1, backoff: float = 0.9):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_ms = target_ms
+        self.backoff = backoff
+        self.in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._last_decrease = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, max_limit: int, target_ms: float) -> "AIMDLimiter":
+        """Configured through CONCURRENCY_<NAME>_MAX and CONCURRENCY_<NAME>_TARGET_MS; reported on /metrics"""
+        max_limit = int(os.getenv(f"CONCURRENCY_{name.upper()}_MAX", str(max_limit)))
+        target_ms = float(os.getenv(f"CONCURRENCY_{name.upper()}_TARGET_MS", str(target_ms)))
+        limiter = cls(name, initial=max(1, max_limit // 2), max_limit=max_limit, target_ms=target_ms)
+        register_metrics(f"concurrency_{name}", limiter.stats)
+        return limiter
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.accepted += 1
+        return True
+
+    def release(self, latency_ms: float, failed: bool = False) -> None:
+        self.in_flight -= 1
+        if failed or latency_ms > self.target_ms:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_ms / 1000:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "target_ms": self.target_ms,
+            "in_flight": self.in_flight,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+        }
+
+
+def route_class(path: str) -> Optional[str]:
+    """Limiter name for a request path, or None if it is not limited"""
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path in EXPENSIVE_PATHS or path.startswith(EXPENSIVE_PREFIXES):
+        return "expensive"
+    if path.startswith("/users/") and path.endswith(EXPENSIVE_USER_SUFFIXES):
+        return "expensive"
+    return "default"
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware that sheds load with a fast 503 once a route class is at its limit"""
+
+    def __init__(self, app, limiters: Dict[str, AIMDLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        name = route_class(scope["path"]) if scope["type"] == "http" else None
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not limiter.try_acquire():
+            await self._reject(send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release((time.perf_counter() - started) * 1000, failed=status_code in OVERLOAD_STATUS_CODES)
+
+    @staticmethod
+    async def _reject(send) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+concurrency_limiters = {
+    "expensive": AIMDLimiter.from_env("expensive", max_limit=8, target_ms=1500),
+    "default": AIMDLimiter.from_env("default", max_limit=64, target_ms=500),
+}
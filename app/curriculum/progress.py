@@ -0,0 +1,69 @@
+from typing import Iterable, Iterator, List
+import base64
+
+TOTAL_WEEKS = 36
+WEEKS_PER_BLOC = 12
+
+# Week n is bit n - 1 of users.completed_weeks_mask (a BIGINT kept in sync by a trigger)
+ALL_WEEKS_MASK = (1 << TOTAL_WEEKS) - 1
+MASK_BYTES = (TOTAL_WEEKS + 7) // 8
+
+
+def week_bit(week: int) -> int:
+    if not 1 <= week <= TOTAL_WEEKS:
+        raise ValueError(f"Week must be between 1 and {TOTAL_WEEKS}, got {week}")
+    return 1 << (week - 1)
+
+
+def weeks_to_mask(weeks: Iterable[int]) -> int:
+    """Bitmask of a completed_weeks list; weeks outside the curriculum are ignored"""
+    mask = 0
+    for week in weeks:
+        if 1 <= week <= TOTAL_WEEKS:
+            mask |= 1 << (week - 1)
+    return mask
+
+
+def iter_weeks(mask: int) -> Iterator[int]:
+    """Completed weeks of a mask in ascending order"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length()
+        mask ^= lowest
+
+
+def mask_to_weeks(mask: int) -> List[int]:
+    return list(iter_weeks(mask))
+
+
+def has_week(mask: int, week: int) -> bool:
+    return bool(mask & week_bit(week))
+
+
+def add_week(mask: int, week: int) -> int:
+    return mask | week_bit(week)
+
+
+def completed_count(mask: int) -> int:
+    """Number of completed weeks (popcount)"""
+    return bin(mask & ALL_WEEKS_MASK).count("1")
+
+
+def bloc_mask(bloc: int) -> int:
+    """Bits of the weeks in a bloc (1-3)"""
+    if not 1 <= bloc <= TOTAL_WEEKS // WEEKS_PER_BLOC:
+        raise ValueError(f"Unknown bloc {bloc}")
+    return ((1 << WEEKS_PER_BLOC) - 1) << ((bloc - 1) * WEEKS_PER_BLOC)
+
+
+def bloc_completed_count(mask: int, bloc: int) -> int:
+    return completed_count(mask & bloc_mask(bloc))
+
+
+def encode_mask(mask: int) -> str:
+    """Pack a mask as base64 of MASK_BYTES little-endian bytes (8 characters for 36 weeks)"""
+    return base64.b64encode((mask & ALL_WEEKS_MASK).to_bytes(MASK_BYTES, "little")).decode()
+
+
+def decode_mask(encoded: str) -> int:
+    return int.from_bytes(base64.b64decode(encoded), "little")
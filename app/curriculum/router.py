@@ -1,12 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List
-from ..database import get_supabase
+from ..cache import TTLCache
+from ..database import get_supabase, Client
 from ..schemas import WeekActivityCreate, WeekActivityResponse
 from ..dependencies import get_current_user, get_current_admin
+from ..singleflight import single_flight
+import os
 
 router = APIRouter(prefix="/curriculum", tags=["curriculum"])
 
+CURRICULUM_CACHE_TTL_SECONDS = float(os.getenv("CURRICULUM_CACHE_TTL_SECONDS", "300"))
+
+# The curriculum is a few dozen rows that change only through the admin endpoints below
+curriculum_cache = TTLCache(ttl=CURRICULUM_CACHE_TTL_SECONDS, maxsize=1)
+
+
+def fetch_curriculum(supabase: Client) -> List[WeekActivityResponse]:
+    """Query all week activities ordered by week and cache them"""
+    response = supabase.table("week_activities").select("*").order("week").execute()
+    weeks = [WeekActivityResponse.model_validate(week) for week in response.data]
+    curriculum_cache.set("weeks", weeks)
+    return weeks
+
+
+async def load_curriculum(supabase: Client) -> List[WeekActivityResponse]:
+    """Get all week activities ordered by week, from cache when possible"""
+    weeks = curriculum_cache.get("weeks")
+    if weeks is None:
+        # A cohort opening the curriculum at once after a miss shares one query
+        weeks = await single_flight.do("curriculum:weeks", lambda: run_in_threadpool(fetch_curriculum, supabase))
+    return weeks
+
 
 @router.get("/weeks", response_model=List[WeekActivityResponse])
 async def get_all_weeks(
@@ -14,8 +39,7 @@ async def get_all_weeks(
     supabase: Client = Depends(get_supabase)
 ):
     """Get all week activities"""
-    response = supabase.table("week_activities").select("*").order("week").execute()
-    return [WeekActivityResponse.model_validate(week) for week in response.data]
+    return await load_curriculum(supabase)
 
 
 @router.get("/weeks/{week_number}", response_model=WeekActivityResponse)
@@ -25,13 +49,13 @@ async def get_week_activity(
     supabase: Client = Depends(get_supabase)
 ):
     """Get specific week activity"""
-    response = supabase.table("week_activities").select("*").eq("week", week_number).execute()
-    if not response.data:
+    week = next((w for w in await load_curriculum(supabase) if w.week == week_number), None)
+    if week is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Week {week_number} activity not found"
         )
-    return WeekActivityResponse.model_validate(response.data[0])
+    return week
 
 
 @router.get("/bloc/{bloc_number}", response_model=List[WeekActivityResponse])
@@ -46,8 +70,7 @@ async def get_bloc_activities(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bloc number must be 1, 2, or 3"
         )
-    response = supabase.table("week_activities").select("*").eq("bloc_number", bloc_number).order("week").execute()
-    return [WeekActivityResponse.model_validate(week) for week in response.data]
+    return [week for week in await load_curriculum(supabase) if week.bloc_number == bloc_number]
 
 
 @router.post("/weeks", response_model=WeekActivityResponse, status_code=status.HTTP_201_CREATED)
@@ -57,7 +80,7 @@ async def create_week_activity(
     supabase: Client = Depends(get_supabase)
 ):
     """Create a new week activity (admin only)"""
-    existing_response = supabase.table("week_activities").select("*").eq("week", week_data.week).execute()
+    existing_response = await run_in_threadpool(supabase.table("week_activities").select("*").eq("week", week_data.week).execute)
     if existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,7 +88,8 @@ async def create_week_activity(
         )
     
     week_dict = week_data.model_dump()
-    response = supabase.table("week_activities").insert(week_dict).execute()
+    response = await run_in_threadpool(supabase.table("week_activities").insert(week_dict).execute)
+    curriculum_cache.clear()
     return WeekActivityResponse.model_validate(response.data[0])
 
 
@@ -77,7 +101,7 @@ async def update_week_activity(
     supabase: Client = Depends(get_supabase)
 ):
     """Update week activity (admin only)"""
-    existing_response = supabase.table("week_activities").select("*").eq("week", week_number).execute()
+    existing_response = await run_in_threadpool(supabase.table("week_activities").select("*").eq("week", week_number).execute)
     if not existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,7 +109,8 @@ async def update_week_activity(
         )
     
     update_data = week_data.model_dump()
-    response = supabase.table("week_activities").update(update_data).eq("week", week_number).execute()
+    response = await run_in_threadpool(supabase.table("week_activities").update(update_data).eq("week", week_number).execute)
+    curriculum_cache.clear()
     return WeekActivityResponse.model_validate(response.data[0])
 
 
@@ -96,12 +121,13 @@ async def delete_week_activity(
     supabase: Client = Depends(get_supabase)
 ):
     """Delete week activity (admin only)"""
-    existing_response = supabase.table("week_activities").select("*").eq("week", week_number).execute()
+    existing_response = await run_in_threadpool(supabase.table("week_activities").select("*").eq("week", week_number).execute)
     if not existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Week {week_number} activity not found"
         )
     
-    supabase.table("week_activities").delete().eq("week", week_number).execute()
+    await run_in_threadpool(supabase.table("week_activities").delete().eq("week", week_number).execute)
+    curriculum_cache.clear()
     return None
@@ -1,17 +1,17 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from .metrics import register_metrics
 import os
-from typing import Generator
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "https://xlkqhnssdyfxqjvtyxcp.supabase.co")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
+if TYPE_CHECKING:
+    from supabase import Client
+else:
+    # Importing supabase costs a third of startup; it is only loaded by init_supabase
+    Client = Any
 
-if not SUPABASE_KEY:
-    raise ValueError(
-        "SUPABASE_ANON_KEY environment variable is required. "
-        "Get your Supabase anon key from: https://app.supabase.com/project/_/settings/api"
-    )
+DEFAULT_SUPABASE_URL = "https://xlkqhnssdyfxqjvtyxcp.supabase.co"
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+_supabase: Optional[Client] = None
+_http_transport = None
 
 
 class Base:
@@ -19,11 +19,54 @@ class Base:
     pass
 
 
+def init_supabase() -> Client:
+    """
+    Create the Supabase client on first use.
+
+    Called from the application lifespan so importing the app (tests, scripts)
+    neither needs SUPABASE_ANON_KEY nor pays for client setup.
+    """
+    global _supabase, _http_transport
+    if _supabase is None:
+        supabase_key = os.getenv("SUPABASE_ANON_KEY")
+        if not supabase_key:
+            raise ValueError(
+                "SUPABASE_ANON_KEY environment variable is required. "
+                "Get your Supabase anon key from: https://app.supabase.com/project/_/settings/api"
+            )
+        from supabase import ClientOptions, create_client
+        from .http_pool import build_postgrest_http_client, build_postgrest_transport
+        from .resilience import ResilientTransport, postgrest_breaker
+        _http_transport = build_postgrest_transport()
+        resilient_transport = ResilientTransport(_http_transport, postgrest_breaker)
+        http_client = build_postgrest_http_client(resilient_transport)
+        _supabase = create_client(
+            os.getenv("SUPABASE_URL", DEFAULT_SUPABASE_URL),
+            supabase_key,
+            options=ClientOptions(httpx_client=http_client)
+        )
+        register_metrics("postgrest_pool", _http_transport.stats)
+        register_metrics("postgrest_resilience", resilient_transport.stats)
+    return _supabase
+
+
+def http_pool_stats() -> Optional[Dict[str, Any]]:
+    """Connection pool statistics of the PostgREST client, once it has been created"""
+    return _http_transport.stats() if _http_transport is not None else None
+
+
 def get_supabase() -> Client:
     """Dependency to get Supabase client"""
-    return supabase
+    return init_supabase()
 
 
 def get_db() -> Client:
     """Compatibility function - returns Supabase client (for backward compatibility)"""
-    return supabase
+    return init_supabase()
+
+
+def __getattr__(name: str):
+    # Keeps `from app.database import supabase` working in scripts
+    if name == "supabase":
+        return init_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,42 +1,82 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from .database import get_supabase
-from supabase import Client
-from typing import Dict, Any
+from .auth.revocation import revoked_tokens
+from .cache import TTLCache
+from typing import Dict, Any, Optional
+import hashlib
 import os
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
 
 security = HTTPBearer()
 
+# Verified claims by token digest, each kept until its own exp; a page load
+# sends the same token many times
+verified_tokens = TTLCache(ttl=0, maxsize=TOKEN_CACHE_SIZE)
+
+
+def _verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify a JWT signature and claims, reusing earlier results until the token expires"""
+    key = hashlib.sha256(token.encode()).digest()
+    claims = verified_tokens.get(key)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    remaining = claims.get("exp", 0) - time.time()
+    if remaining > 0:
+        verified_tokens.set(key, claims, ttl=remaining)
+    return claims
+
+
+def decode_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
+    """Verify a JWT and return its claims, or None if invalid, of another type or revoked"""
+    claims = _verify_token(token)
+    if claims is None:
+        return None
+    if claims.get("type") != token_type or not claims.get("sub") or not claims.get("jti"):
+        return None
+    if revoked_tokens.is_revoked(claims):
+        return None
+    return claims
+
+
+def get_user_from_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve an access token to its user, or None if the token is invalid.
+
+    The user is built from the token claims instead of a database lookup:
+    access tokens are short-lived and revocable, so the claims are at most
+    ACCESS_TOKEN_EXPIRE_MINUTES stale. Fetch the row when more is needed.
+    """
+    claims = decode_token(token)
+    if claims is None:
+        return None
+    return {
+        "id": claims["sub"],
+        "role": claims.get("role"),
+        "name": claims.get("name"),
+        "email": claims.get("email")
+    }
+
 
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: Client = Depends(get_supabase)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """Get current authenticated user from JWT token"""
-    token = credentials.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
-    if not response.data:
-        raise credentials_exception
-    
-    user = response.data[0]
+    user = get_user_from_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
@@ -0,0 +1,2 @@
+# Health checks feature
+
@@ -0,0 +1,90 @@
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, Optional
+from ..database import get_supabase
+import anyio.to_thread
+import asyncio
+import os
+import time
+
+READY_PROBE_TTL_SECONDS = float(os.getenv("READY_PROBE_TTL_SECONDS", "5"))
+READY_PROBE_TIMEOUT_SECONDS = float(os.getenv("READY_PROBE_TIMEOUT_SECONDS", "2"))
+READY_MAX_DB_LATENCY_MS = float(os.getenv("READY_MAX_DB_LATENCY_MS", "1000"))
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", "250"))
+READY_MAX_POOL_SATURATION = float(os.getenv("READY_MAX_POOL_SATURATION", "0.9"))
+READY_MAX_HASH_QUEUE = int(os.getenv("READY_MAX_HASH_QUEUE", "16"))
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag as how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            # Rise immediately, decay slowly, so one quiet sample does not hide a stall
+            self.lag_ms = lag_ms if lag_ms > self.lag_ms else 0.8 * self.lag_ms + 0.2 * lag_ms
+
+
+class DatabaseProbe:
+    """Cheap database round trip, cached so frequent readiness checks stay free"""
+
+    def __init__(self, ttl: float = READY_PROBE_TTL_SECONDS, timeout: float = READY_PROBE_TIMEOUT_SECONDS):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < self.ttl
+
+    async def check(self) -> Dict[str, Any]:
+        if self._fresh():
+            return self._result
+        async with self._lock:
+            # Concurrent readiness checks share one probe
+            if self._fresh():
+                return self._result
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(run_in_threadpool(self._query), timeout=self.timeout)
+                error = None
+            except Exception as e:
+                error = type(e).__name__
+            self._result = {
+                "ok": error is None,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": error
+            }
+            self._checked_at = time.monotonic()
+            return self._result
+
+    @staticmethod
+    def _query() -> None:
+        get_supabase().table("week_activities").select("week").limit(1).execute()
+
+
+def threadpool_saturation() -> float:
+    """Share of the default threadpool (used for blocking calls) currently in use"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return round(limiter.borrowed_tokens / limiter.total_tokens, 3)
+
+
+loop_lag_monitor = LoopLagMonitor()
+database_probe = DatabaseProbe()
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from ..auth.utils import hash_queue_depth
+from ..database import http_pool_stats
+from ..warmup import warmup_state
+from .probes import (
+    database_probe, loop_lag_monitor, threadpool_saturation,
+    READY_MAX_DB_LATENCY_MS, READY_MAX_LOOP_LAG_MS, READY_MAX_POOL_SATURATION, READY_MAX_HASH_QUEUE
+)
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """Readiness probe: warm-up is done and dependencies are within thresholds"""
+    if not warmup_state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming_up"}
+        )
+    
+    database = await database_probe.check()
+    loop_lag_ms = round(loop_lag_monitor.lag_ms, 1)
+    pool_saturation = threadpool_saturation()
+    postgrest_pool = http_pool_stats() or {"saturation": 0.0, "waiting": 0}
+    hash_queue = hash_queue_depth()
+    
+    checks = {
+        "database": {**database, "ok": database["ok"] and database["latency_ms"] <= READY_MAX_DB_LATENCY_MS},
+        "event_loop": {"ok": loop_lag_ms <= READY_MAX_LOOP_LAG_MS, "lag_ms": loop_lag_ms},
+        "threadpool": {"ok": pool_saturation <= READY_MAX_POOL_SATURATION, "saturation": pool_saturation},
+        "postgrest_pool": {
+            "ok": postgrest_pool["saturation"] <= READY_MAX_POOL_SATURATION,
+            "saturation": postgrest_pool["saturation"],
+            "waiting": postgrest_pool["waiting"]
+        },
+        "password_hashing": {"ok": hash_queue <= READY_MAX_HASH_QUEUE, "queue_depth": hash_queue},
+    }
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
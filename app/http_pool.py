@@ -0,0 +1,128 @@
+from typing import Any, Dict, Iterator, List, Optional
+import httpx
+import os
+import threading
+import weakref
+
+POSTGREST_MAX_CONNECTIONS = int(os.getenv("POSTGREST_MAX_CONNECTIONS", "20"))
+POSTGREST_MAX_KEEPALIVE = int(os.getenv("POSTGREST_MAX_KEEPALIVE", "10"))
+POSTGREST_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("POSTGREST_KEEPALIVE_EXPIRY_SECONDS", "60"))
+POSTGREST_HTTP2 = os.getenv("POSTGREST_HTTP2", "true").lower() in ("1", "true", "yes")
+POSTGREST_CONNECT_TIMEOUT_SECONDS = float(os.getenv("POSTGREST_CONNECT_TIMEOUT_SECONDS", "5"))
+POSTGREST_READ_TIMEOUT_SECONDS = float(os.getenv("POSTGREST_READ_TIMEOUT_SECONDS", "15"))
+POSTGREST_POOL_TIMEOUT_SECONDS = float(os.getenv("POSTGREST_POOL_TIMEOUT_SECONDS", "5"))
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response stream that reports back to the transport once it is closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    """
+    HTTP transport that keeps connection pool statistics for /metrics.
+
+    Requests are counted in the wrapper itself; a request holds a connection
+    from the time it is sent until its response stream is closed, so in-use
+    and waiting counts derive from requests in flight (exact for HTTP/1.1,
+    an upper bound with HTTP/2 multiplexing). Open connections come from the
+    pool's connection list when the installed httpx exposes it, and are
+    reported as None otherwise.
+    """
+
+    def __init__(self, limits: httpx.Limits, **kwargs):
+        super().__init__(limits=limits, **kwargs)
+        self.max_connections = limits.max_connections
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.connections_created = 0
+        self._seen_connections: "weakref.WeakSet" = weakref.WeakSet()
+        # The sync client is shared by the event loop thread and threadpool workers
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests_total += 1
+            self.requests_in_flight += 1
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            self._release()
+            raise
+        self._count_new_connections()
+        response.stream = _ReleasingStream(response.stream, self._release)
+        return response
+
+    def _release(self) -> None:
+        with self._lock:
+            self.requests_in_flight -= 1
+
+    def _open_connections(self) -> Optional[List[Any]]:
+        """Connections in the underlying pool, or None if this httpx/httpcore does not expose them"""
+        connections = getattr(getattr(self, "_pool", None), "connections", None)
+        try:
+            return list(connections) if connections is not None else None
+        except TypeError:
+            return None
+
+    def _count_new_connections(self) -> None:
+        connections = self._open_connections()
+        if connections is None:
+            return
+        with self._lock:
+            for connection in connections:
+                if connection not in self._seen_connections:
+                    self._seen_connections.add(connection)
+                    self.connections_created += 1
+
+    def stats(self) -> Dict[str, Any]:
+        in_flight = self.requests_in_flight
+        in_use = min(in_flight, self.max_connections) if self.max_connections else in_flight
+        connections = self._open_connections()
+        open_count = len(connections) if connections is not None else None
+        return {
+            "max_connections": self.max_connections,
+            "open": open_count,
+            "in_use": in_use,
+            "idle": max(0, open_count - in_use) if open_count is not None else None,
+            # Requests beyond the connection limit wait for the pool
+            "waiting": in_flight - in_use,
+            "created": self.connections_created if connections is not None else None,
+            "requests_total": self.requests_total,
+            "requests_in_flight": in_flight,
+            "saturation": round(in_use / self.max_connections, 3) if self.max_connections else 0.0,
+        }
+
+
+def build_postgrest_transport() -> InstrumentedTransport:
+    """Pooled transport for PostgREST with explicit pool, keep-alive and HTTP/2 settings"""
+    limits = httpx.Limits(
+        max_connections=POSTGREST_MAX_CONNECTIONS,
+        max_keepalive_connections=POSTGREST_MAX_KEEPALIVE,
+        keepalive_expiry=POSTGREST_KEEPALIVE_EXPIRY_SECONDS
+    )
+    return InstrumentedTransport(limits=limits, http2=POSTGREST_HTTP2)
+
+
+def build_postgrest_http_client(transport: httpx.BaseTransport) -> httpx.Client:
+    """HTTP client for PostgREST with connect, read and pool timeouts"""
+    timeout = httpx.Timeout(
+        POSTGREST_READ_TIMEOUT_SECONDS,
+        connect=POSTGREST_CONNECT_TIMEOUT_SECONDS,
+        pool=POSTGREST_POOL_TIMEOUT_SECONDS
+    )
+    return httpx.Client(transport=transport, timeout=timeout, follow_redirects=True)
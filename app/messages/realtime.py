@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence, Set
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+MESSAGE_WS_QUEUE_SIZE = int(os.getenv("MESSAGE_WS_QUEUE_SIZE", "32"))
+
+# Browsers cannot set headers on a WebSocket handshake, so clients pass the access
+# token as a subprotocol pair: new WebSocket(url, ["bearer", token])
+BEARER_SUBPROTOCOL = "bearer"
+
+logger = logging.getLogger(__name__)
+
+
+def token_from_subprotocols(subprotocols: Sequence[str]) -> Optional[str]:
+    """Return the token following the bearer subprotocol, or None if there is none"""
+    subprotocols = list(subprotocols)
+    if BEARER_SUBPROTOCOL not in subprotocols:
+        return None
+    index = subprotocols.index(BEARER_SUBPROTOCOL)
+    if index + 1 >= len(subprotocols):
+        return None
+    return subprotocols[index + 1]
+
+
+class Connection:
+    """A single WebSocket connection with a bounded outbound queue"""
+
+    __slots__ = ("websocket", "user_id", "queue", "closed")
+
+    def __init__(self, websocket: WebSocket, user_id: str, queue_size: int = MESSAGE_WS_QUEUE_SIZE):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without blocking; returns False if the client is too slow"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def sender(self) -> None:
+        """Drain the outbound queue; each send waits on the socket, which gives us backpressure"""
+        while True:
+            event = await self.queue.get()
+            if event is None:
+                return
+            await self.websocket.send_json(event)
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Wake the sender so it exits even when the queue is full
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+        try:
+            await self.websocket.close(code=code)
+        except RuntimeError:
+            # Socket already closed by the client
+            pass
+
+
+class ConnectionHub:
+    """
+    Per-process registry of connected users.
+
+    Idle connections only hold a queue and the two tasks serving the socket,
+    so a worker can keep thousands of them open. Keep-alive pings are left to
+    the ASGI server (uvicorn --ws-ping-interval). Delivery is best effort and
+    local to this worker; clients resync through /messages/received.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, Set[Connection]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(conns) for conns in self._connections.values())
+
+    def register(self, connection: Connection) -> None:
+        self._connections.setdefault(connection.user_id, set()).add(connection)
+
+    def unregister(self, connection: Connection) -> None:
+        conns = self._connections.get(connection.user_id)
+        if not conns:
+            return
+        conns.discard(connection)
+        if not conns:
+            del self._connections[connection.user_id]
+
+    def is_connected(self, user_id: str) -> bool:
+        return user_id in self._connections
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> int:
+        """Deliver an event to every connection of a user; returns how many accepted it"""
+        delivered = 0
+        for connection in list(self._connections.get(user_id, ())):
+            if connection.offer(event):
+                delivered += 1
+            else:
+                # Slow consumer: drop it rather than buffer without bound
+                self.unregister(connection)
+                asyncio.ensure_future(connection.close(status.WS_1013_TRY_AGAIN_LATER))
+        return delivered
+
+    @staticmethod
+    async def _receive(connection: Connection) -> None:
+        # Clients do not send anything meaningful; reading only detects disconnects
+        try:
+            while True:
+                await connection.websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    async def serve(self, connection: Connection) -> None:
+        """Run a registered connection until the client disconnects or sending fails"""
+        self.register(connection)
+        sender = asyncio.ensure_future(connection.sender())
+        receiver = asyncio.ensure_future(self._receive(connection))
+        try:
+            await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.unregister(connection)
+            receiver.cancel()
+            sender.cancel()
+        if sender.done() and not sender.cancelled() and sender.exception() is not None:
+            logger.warning("Sending to user %s failed: %r", connection.user_id, sender.exception())
+            await connection.close(status.WS_1011_INTERNAL_ERROR)
+        connection.closed = True
+
+
+hub = ConnectionHub()
@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
 from typing import List
 from datetime import datetime
-from ..database import get_supabase
-from ..schemas import MessageCreate, MessageResponse, MessageResponseRequest
-from ..dependencies import get_current_user
+from ..database import get_supabase, Client
+from ..schemas import MessageCreate, MessageResponse, MessageResponseRequest, ConversationResponse, MessageSearchPage
+from ..dependencies import get_current_user, get_user_from_token
+from ..users.utils import get_user_names
+from ..postgres import postgres
+from .realtime import BEARER_SUBPROTOCOL, Connection, hub, token_from_subprotocols
+from .search import encode_cursor, decode_cursor
 import uuid
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 
+def _to_message_response(message: Dict[str, Any], names: Dict[str, str]) -> MessageResponse:
+    """Build a MessageResponse from a messages row and resolved participant names"""
+    return MessageResponse.model_validate({
+        **message,
+        "from_name": names.get(message["from_id"], "Unknown"),
+        "to_name": names.get(message["to_id"], "Unknown"),
+    })
+
+
 @router.post("/", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_message(
     message_data: MessageCreate,
@@ -59,6 +72,7 @@ async def send_message(
         created_at=new_message.created_at
     )
     
+    hub.publish(response.to_id, {"event": "message", "data": response.model_dump(mode="json")})
     return response
 
 
@@ -69,6 +83,10 @@ async def get_messages(
     status_filter: str = None
 ):
     """Get messages for current user"""
+    if postgres.enabled:
+        rows = await postgres.fetch_messages(current_user.get("id"), status_filter)
+        return [MessageResponse.model_validate(row) for row in rows]
+    
     query = db.query(Message).filter(
         (Message.from_id == current_user.id) | (Message.to_id == current_user.id)
     )
@@ -102,6 +120,62 @@ async def get_messages(
     return result
 
 
+@router.get("/conversations", response_model=List[ConversationResponse])
+async def get_conversations(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get one entry per counterpart with the latest message, newest first"""
+    user_id = current_user.get("id")
+    rows = (await run_in_threadpool(supabase.rpc("get_conversations", {"target_user_id": user_id}, get=True).execute)).data
+    
+    result = []
+    for row in rows:
+        counterpart_name = row["counterpart_name"] or "Unknown"
+        names = {user_id: current_user.get("name"), row["counterpart_id"]: counterpart_name}
+        result.append(ConversationResponse(
+            counterpart_id=row["counterpart_id"],
+            counterpart_name=counterpart_name,
+            awaiting_count=row["awaiting_count"],
+            last_message=_to_message_response(row["last_message"], names)
+        ))
+    
+    return result
+
+
+@router.get("/search", response_model=MessageSearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Full-text search over the current user's messages, best match first"""
+    params = {"target_user_id": current_user.get("id"), "search_query": q, "page_size": limit}
+    if cursor:
+        try:
+            params["after_rank"], params["after_id"] = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    rows = (await run_in_threadpool(supabase.rpc("search_messages", params, get=True).execute)).data
+    messages = [row["message"] for row in rows]
+    names = await run_in_threadpool(get_user_names, supabase, [m["from_id"] for m in messages] + [m["to_id"] for m in messages])
+    
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["message"]["id"])
+    
+    return MessageSearchPage(
+        items=[_to_message_response(m, names) for m in messages],
+        next_cursor=next_cursor
+    )
+
+
 @router.get("/sent", response_model=List[MessageResponse])
 async def get_sent_messages(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -168,6 +242,19 @@ async def get_received_messages(
     return result
 
 
+@router.websocket("/ws")
+async def message_stream(websocket: WebSocket):
+    """Stream new messages and responses to the connected user (token passed as the subprotocol after "bearer")"""
+    token = token_from_subprotocols(websocket.scope.get("subprotocols", []))
+    user = get_user_from_token(token) if token else None
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept(subprotocol=BEARER_SUBPROTOCOL)
+    await hub.serve(Connection(websocket, user["id"]))
+
+
 @router.get("/{message_id}", response_model=MessageResponse)
 async def get_message(
     message_id: str,
@@ -210,6 +297,32 @@ async def get_message(
     )
 
 
+@router.get("/{message_id}/thread", response_model=List[MessageResponse])
+async def get_message_thread(
+    message_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get the whole reply thread containing a message, oldest first"""
+    # Single recursive query: walks up to the root, then down the reply tree
+    thread = (await run_in_threadpool(supabase.rpc("get_message_thread", {"target_id": message_id}, get=True).execute)).data
+    message = next((m for m in thread if m["id"] == message_id), None)
+    if not message:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    
+    if message["from_id"] != current_user.get("id") and message["to_id"] != current_user.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    names = await run_in_threadpool(get_user_names, supabase, [m["from_id"] for m in thread] + [m["to_id"] for m in thread])
+    return [_to_message_response(m, names) for m in thread]
+
+
 @router.post("/{message_id}/respond", response_model=MessageResponse)
 async def respond_to_message(
     message_id: str,
@@ -262,7 +375,7 @@ async def respond_to_message(
     
     recipient = db.query(User).filter(User.id == original_message.from_id).first()
     
-    return MessageResponse(
+    result = MessageResponse(
         id=original_message.id,
         from_id=original_message.from_id,
         from_name=recipient.name if recipient else "Unknown",
@@ -278,4 +391,6 @@ async def respond_to_message(
         responded_at=original_message.responded_at,
         created_at=original_message.created_at
     )
-
+    
+    hub.publish(result.from_id, {"event": "response", "data": result.model_dump(mode="json")})
+    return result
@@ -0,0 +1,117 @@
+import base64
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Message fields covered by the search index (same as messages.search_vector)
+SEARCH_FIELDS = ("subject", "content", "response")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+def encode_cursor(rank: float, message_id: str) -> str:
+    """Encode a keyset position (rank, id) as an opaque cursor"""
+    raw = f"{rank!r}:{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        return float(rank), message_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class MessageSearchIndex:
+    """
+    In-memory inverted index mirroring the search_messages RPC.
+
+    Terms are ANDed like plainto_tsquery and hits are ranked like
+    ts_rank(..., 1): term frequency divided by 1 + log(document length).
+    Unlike Postgres' english configuration there is no stemming. Used to
+    benchmark search locally without a database.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def add(self, message: Dict[str, Any]) -> None:
+        message_id = message["id"]
+        if message_id in self._messages:
+            self.remove(message_id)
+        tokens = [token for field in SEARCH_FIELDS for token in tokenize(message.get(field))]
+        for token in tokens:
+            postings = self._postings.setdefault(token, {})
+            postings[message_id] = postings.get(message_id, 0) + 1
+        self._messages[message_id] = message
+        self._lengths[message_id] = len(tokens)
+        for user_id in (message["from_id"], message["to_id"]):
+            self._by_user.setdefault(user_id, set()).add(message_id)
+
+    def remove(self, message_id: str) -> None:
+        message = self._messages.pop(message_id, None)
+        if message is None:
+            return
+        del self._lengths[message_id]
+        for user_id in (message["from_id"], message["to_id"]):
+            owned = self._by_user.get(user_id)
+            if owned is not None:
+                owned.discard(message_id)
+                if not owned:
+                    del self._by_user[user_id]
+        for field in SEARCH_FIELDS:
+            for token in set(tokenize(message.get(field))):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+                postings.pop(message_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        after: Optional[Tuple[float, str]] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return up to limit (rank, message) hits visible to user_id, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        posting_lists = [self._postings.get(term, {}) for term in terms]
+        # Intersect the smallest sets first; the user's own messages usually win
+        candidate_sets = sorted(posting_lists + [self._by_user.get(user_id, set())], key=len)
+        candidates: Set[str] = set(candidate_sets[0])
+        for other in candidate_sets[1:]:
+            # Membership checks only; never materialize the larger posting list
+            candidates = {message_id for message_id in candidates if message_id in other}
+            if not candidates:
+                return []
+
+        hits = []
+        for message_id in candidates:
+            frequency = sum(postings[message_id] for postings in posting_lists)
+            rank = frequency / (1 + math.log(self._lengths[message_id]))
+            if after is not None and (rank, message_id) >= after:
+                continue
+            hits.append((rank, message_id))
+
+        hits.sort(reverse=True)
+        return [(rank, self._messages[message_id]) for rank, message_id in hits[:limit]]
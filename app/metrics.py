@@ -0,0 +1,13 @@
+from typing import Any, Callable, Dict
+
+_sources: Dict[str, Callable[[], Any]] = {}
+
+
+def register_metrics(name: str, source: Callable[[], Any]) -> None:
+    """Register a callable whose result is reported under name by /metrics"""
+    _sources[name] = source
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Snapshot every registered metrics source"""
+    return {name: source() for name, source in _sources.items()}
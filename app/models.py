@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Integer, Boolean, DateTime, ForeignKey, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -19,6 +19,7 @@ class User(Base):
     mentee_number = Column(String, nullable=True)
     current_week = Column(Integer, default=1)
     completed_weeks = Column(JSON, default=list)  # List of week numbers
+    completed_weeks_mask = Column(BigInteger, default=0)  # Same weeks as bits, week n = bit n - 1
     mentor_id = Column(String, ForeignKey("users.id"), nullable=True)
     parent_email = Column(String, nullable=True)
     parent_name = Column(String, nullable=True)
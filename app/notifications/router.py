@@ -1,14 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any
 from typing import List
-from ..database import get_supabase
-from ..schemas import NotificationResponse, WeekApprovalResponse, MessageResponse
+from ..cache import TTLCache
+from ..database import get_supabase, Client
+from ..schemas import NotificationResponse, NotificationCounts, WeekApprovalResponse, MessageResponse
 from ..dependencies import get_current_user
+import asyncio
+import os
 import uuid
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+COUNTS_CACHE_TTL_SECONDS = float(os.getenv("COUNTS_CACHE_TTL_SECONDS", "5"))
+
+# Per-user badge counts, short-lived so clients can poll cheaply
+counts_cache = TTLCache(ttl=COUNTS_CACHE_TTL_SECONDS, maxsize=10000)
+
+
+def _count(query) -> int:
+    """Execute a head-only count query and return the row count"""
+    return query.execute().count or 0
+
 
 @router.get("/", response_model=List[NotificationResponse])
 async def get_notifications(
@@ -164,3 +177,40 @@ async def get_pending_items(
         "messages": pending_messages
     }
 
+
+@router.get("/counts", response_model=NotificationCounts)
+async def get_notification_counts(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get badge counts of pending approvals and messages awaiting response"""
+    user_id = current_user.get("id")
+    role = current_user.get("role")
+    
+    cached = counts_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    approvals_query = None
+    if role in ["mentor", "mentee", "admin"]:
+        approvals_query = supabase.table("week_approvals").select("id", count="exact", head=True).eq("status", "pending")
+        if role == "mentor":
+            approvals_query = approvals_query.eq("mentor_id", user_id)
+        elif role == "mentee":
+            approvals_query = approvals_query.eq("mentee_id", user_id)
+    
+    messages_query = supabase.table("messages").select("id", count="exact", head=True).eq("status", "awaiting_response")
+    if role != "admin":
+        messages_query = messages_query.eq("to_id", user_id)
+    
+    if approvals_query is not None:
+        approvals, messages = await asyncio.gather(
+            run_in_threadpool(_count, approvals_query),
+            run_in_threadpool(_count, messages_query)
+        )
+    else:
+        approvals, messages = 0, await run_in_threadpool(_count, messages_query)
+    
+    counts = NotificationCounts(approvals=approvals, messages=messages, total=approvals + messages)
+    counts_cache.set(user_id, counts)
+    return counts
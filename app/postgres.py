@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Optional
+from .metrics import register_metrics
+from .resilience import check_budget
+import json
+import os
+
+# "postgrest" (default) talks to Supabase over HTTP; "asyncpg" connects to DATABASE_URL directly
+DATA_BACKEND = os.getenv("DATA_BACKEND", "postgrest").lower()
+POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2"))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10"))
+POSTGRES_COMMAND_TIMEOUT_SECONDS = float(os.getenv("POSTGRES_COMMAND_TIMEOUT_SECONDS", "10"))
+# Set to 0 behind a transaction-mode pooler (Supabase port 6543), which cannot keep prepared statements
+POSTGRES_STATEMENT_CACHE_SIZE = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "100"))
+
+MESSAGES_WITH_NAMES_SQL = """
+SELECT m.id, m.from_id, coalesce(f.name, 'Unknown') AS from_name,
+       m.to_id, coalesce(t.name, 'Unknown') AS to_name,
+       m.subject, m.content, m.type, m.status, m.week_number,
+       m.parent_message_id, m.response, m.responded_at, m.created_at
+FROM messages m
+LEFT JOIN users f ON f.id = m.from_id
+LEFT JOIN users t ON t.id = m.to_id
+WHERE (m.from_id = $1 OR m.to_id = $1)
+  AND ($2::text IS NULL OR m.status = $2)
+ORDER BY m.created_at DESC
+"""
+
+DASHBOARD_SQL = """
+SELECT count(*) AS total_users,
+       count(*) FILTER (WHERE role = 'mentee') AS mentees,
+       count(*) FILTER (WHERE role = 'mentor') AS mentors,
+       count(*) FILTER (WHERE role = 'parent') AS parents,
+       (SELECT coalesce(jsonb_object_agg(week, completions), '{}'::jsonb)
+        FROM (SELECT w.week, count(*) AS completions
+              FROM users u, generate_series(1, 36) AS w(week)
+              WHERE u.role = 'mentee' AND u.completed_weeks_mask & (1::bigint << (w.week - 1)) <> 0
+              GROUP BY w.week) per_week) AS week_completions
+FROM users
+"""
+
+# Approving and recording the completed week happen in one statement, so they commit together;
+# the users trigger derives completed_weeks_mask from the updated list
+APPROVE_WEEK_SQL = """
+WITH approved AS (
+    UPDATE week_approvals
+    SET status = 'approved', mentor_feedback = $3, approved_at = now()
+    WHERE id = $1 AND mentor_id = $2 AND status = 'pending'
+    RETURNING *
+), mentee AS (
+    UPDATE users u
+    SET completed_weeks = CASE
+            WHEN u.completed_weeks_mask & (1::bigint << (a.week_number - 1)) <> 0
+            THEN u.completed_weeks
+            ELSE coalesce(u.completed_weeks, '[]'::jsonb) || to_jsonb(a.week_number)
+        END,
+        current_week = greatest(coalesce(u.current_week, 1), a.week_number + 1)
+    FROM approved a
+    WHERE u.id = a.mentee_id
+)
+SELECT * FROM approved
+"""
+
+HEATMAP_SQL = """
+SELECT id, name, mentee_number, completed_weeks_mask
+FROM users
+WHERE role = 'mentee' AND ($1::text IS NULL OR mentor_id = $1)
+ORDER BY name, id
+"""
+
+MENTOR_STATS_SQL = "SELECT * FROM get_mentor_stats($1)"
+
+REFRESH_ROLLUPS_SQL = "SELECT refresh_analytics_rollups()"
+
+APPROVAL_SQL = "SELECT * FROM week_approvals WHERE id = $1"
+
+
+async def _init_connection(connection) -> None:
+    # Decode JSONB columns to Python objects like PostgREST does
+    await connection.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+class PostgresBackend:
+    """
+    Direct asyncpg access to the Supabase Postgres database.
+
+    Used instead of PostgREST when DATA_BACKEND=asyncpg, for reads that need
+    joins or aggregates and for writes that must be transactional. asyncpg
+    prepares each statement once per connection and reuses it. Every query
+    is bounded by what is left of the request's database budget.
+    """
+
+    def __init__(self, backend: str = DATA_BACKEND):
+        self.enabled = backend == "asyncpg"
+        self._pool = None
+
+    async def connect(self) -> None:
+        if not self.enabled or self._pool is not None:
+            return
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise ValueError("DATABASE_URL environment variable is required when DATA_BACKEND=asyncpg")
+        import asyncpg
+        self._pool = await asyncpg.create_pool(
+            database_url,
+            min_size=POSTGRES_POOL_MIN_SIZE,
+            max_size=POSTGRES_POOL_MAX_SIZE,
+            command_timeout=POSTGRES_COMMAND_TIMEOUT_SECONDS,
+            statement_cache_size=POSTGRES_STATEMENT_CACHE_SIZE,
+            init=_init_connection
+        )
+        register_metrics("postgres_pool", self.stats)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._pool.get_size() if self._pool is not None else 0
+        idle = self._pool.get_idle_size() if self._pool is not None else 0
+        return {"max_size": POSTGRES_POOL_MAX_SIZE, "size": size, "in_use": size - idle, "idle": idle}
+
+    async def fetch_messages(self, user_id: str, status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Messages of a user, newest first, with both participant names joined in"""
+        rows = await self._pool.fetch(MESSAGES_WITH_NAMES_SQL, user_id, status_filter, timeout=check_budget())
+        return [dict(row) for row in rows]
+
+    async def fetch_dashboard_counts(self) -> Dict[str, Any]:
+        """User counts per role and completions per week, in one round trip"""
+        row = await self._pool.fetchrow(DASHBOARD_SQL, timeout=check_budget())
+        result = dict(row)
+        result["week_completions"] = {int(week): count for week, count in row["week_completions"].items()}
+        return result
+
+    async def fetch_heatmap_rows(self, mentor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every mentee's completed-weeks mask, optionally of one mentor only"""
+        rows = await self._pool.fetch(HEATMAP_SQL, mentor_id, timeout=check_budget())
+        return [dict(row) for row in rows]
+
+    async def fetch_mentor_stats(self, mentor_id: str) -> Dict[str, int]:
+        """Mentee and approval counts of one mentor (the get_mentor_stats function)"""
+        row = await self._pool.fetchrow(MENTOR_STATS_SQL, mentor_id, timeout=check_budget())
+        return dict(row)
+
+    async def refresh_rollups(self):
+        """Run the incremental analytics rollup; returns the new high-water mark"""
+        return await self._pool.fetchval(REFRESH_ROLLUPS_SQL)
+
+    async def approve_week(self, approval_id: str, mentor_id: str, feedback: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Approve a pending approval of this mentor; returns None if nothing was updated"""
+        row = await self._pool.fetchrow(APPROVE_WEEK_SQL, approval_id, mentor_id, feedback, timeout=check_budget())
+        return dict(row) if row is not None else None
+
+    async def fetch_approval(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._pool.fetchrow(APPROVAL_SQL, approval_id, timeout=check_budget())
+        return dict(row) if row is not None else None
+
+
+postgres = PostgresBackend()
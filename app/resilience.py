@@ -0,0 +1,233 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import asyncio
+import httpx
+import os
+import random
+import threading
+import time
+
+DB_REQUEST_BUDGET_SECONDS = float(os.getenv("DB_REQUEST_BUDGET_SECONDS", "8"))
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY_SECONDS = float(os.getenv("DB_RETRY_BASE_DELAY_SECONDS", "0.05"))
+DB_RETRY_MAX_DELAY_SECONDS = float(os.getenv("DB_RETRY_MAX_DELAY_SECONDS", "0.5"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", "15"))
+
+# Gateway errors from Supabase/Cloudflare that mean "backend unhealthy", not "bad query"
+RETRYABLE_STATUS_CODES = {502, 503, 504, 520}
+# Only reads are retried; read-only RPC functions are therefore called with get=True
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("database_deadline", default=None)
+
+
+class DatabaseUnavailable(Exception):
+    """The database could not be reached in time; surfaced to clients as 503"""
+
+    def __init__(self, detail: str, retry_after: float = 1):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(DatabaseUnavailable):
+    pass
+
+
+class CircuitOpen(DatabaseUnavailable):
+    pass
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request's database budget, or None outside a request"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_budget() -> Optional[float]:
+    """Return the remaining budget, raising DeadlineExceeded once it is spent"""
+    budget = remaining_budget()
+    if budget is not None and budget <= 0:
+        raise DeadlineExceeded("Database time budget for this request exceeded")
+    return budget
+
+
+def on_event_loop() -> bool:
+    """Whether the caller runs on an event loop thread, where blocking would stall every request"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def backoff_delay(attempt: int, base: float = DB_RETRY_BASE_DELAY_SECONDS, cap: float = DB_RETRY_MAX_DELAY_SECONDS) -> float:
+    """Exponential backoff with full jitter, so retrying clients spread out"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the backend is unhealthy.
+
+    Opens after failure_threshold consecutive failures, rejects calls for
+    reset_timeout seconds, then lets a single trial call through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = DB_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = DB_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.transitions: Counter = Counter()
+        self.rejected = 0
+        self._trial_in_flight = False
+        # The sync client is called from the event loop thread and threadpool workers
+        self._lock = threading.Lock()
+
+    def allow(self) -> None:
+        """Raise CircuitOpen unless a call may go through now"""
+        with self._lock:
+            if self.state == OPEN:
+                retry_after = self.opened_at + self.reset_timeout - time.monotonic()
+                if retry_after > 0:
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} is unavailable", retry_after)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} is recovering", 1)
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        self.transitions[f"{self.state}->{state}"] += 1
+        self.state = state
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    Wraps the PostgREST transport with the request's deadline budget, jittered
+    retries of idempotent reads and a circuit breaker.
+
+    Exhausted retries raise DatabaseUnavailable instead of returning the
+    gateway error, so postgrest's own (unjittered, up to 30s) retry loop
+    never kicks in. The backoff sleeps in the calling thread, so reads are
+    only retried from worker threads (run_in_threadpool call sites); a read
+    issued directly on the event loop gets a single attempt.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, breaker: CircuitBreaker, attempts: int = DB_RETRY_ATTEMPTS):
+        self.transport = transport
+        self.breaker = breaker
+        self.attempts = attempts
+        self.retries = 0
+        self.deadline_exceeded = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        retryable = request.method in IDEMPOTENT_METHODS
+        attempts = self.attempts if retryable and not on_event_loop() else 1
+        attempt = 0
+        while True:
+            budget = self._check_budget()
+            if budget is not None:
+                timeouts = request.extensions.get("timeout", {})
+                request.extensions["timeout"] = {
+                    key: budget if value is None else min(value, budget) for key, value in timeouts.items()
+                }
+
+            # Every outcome after allow() must be recorded, or a half-open trial never ends
+            self.breaker.allow()
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as exc:
+                self.breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise DatabaseUnavailable("Database request failed") from exc
+            except BaseException:
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if not retryable:
+                    return response
+                response.close()
+                if attempt + 1 >= attempts:
+                    raise DatabaseUnavailable(f"Database returned {response.status_code}")
+
+            attempt += 1
+            self.retries += 1
+            delay = backoff_delay(attempt)
+            budget = remaining_budget()
+            if budget is not None and delay >= budget:
+                self.deadline_exceeded += 1
+                raise DeadlineExceeded("Database time budget for this request exceeded")
+            time.sleep(delay)
+
+    def _check_budget(self) -> Optional[float]:
+        try:
+            return check_budget()
+        except DeadlineExceeded:
+            self.deadline_exceeded += 1
+            raise
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.breaker.stats(), "retries": self.retries, "deadline_exceeded": self.deadline_exceeded}
+
+
+class DeadlineMiddleware:
+    """ASGI middleware giving every HTTP request a budget for its database calls"""
+
+    def __init__(self, app, budget: float = DB_REQUEST_BUDGET_SECONDS):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + self.budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+
+postgrest_breaker = CircuitBreaker("database")
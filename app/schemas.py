@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 # User Schemas
@@ -68,6 +68,13 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserSearchResult(BaseModel):
+    id: str
+    name: str
+    number: Optional[str]
+    role: str
+
+
 # Auth Schemas
 class RegisterRequest(BaseModel):
     name: str
@@ -91,9 +98,29 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class UserUpdateResponse(UserResponse):
+    # Set when users change their own email or role, which revokes their previous tokens
+    token: Optional[str] = None
+    refresh_token: Optional[str] = None
+
+
 class LoginResponse(BaseModel):
     user: UserResponse
     token: str
+    refresh_token: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class ChangePasswordRequest(BaseModel):
+    current_password: str
+    new_password: str
 
 
 class TokenData(BaseModel):
@@ -187,6 +214,18 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class ConversationResponse(BaseModel):
+    counterpart_id: str
+    counterpart_name: str
+    awaiting_count: int
+    last_message: MessageResponse
+
+
+class MessageSearchPage(BaseModel):
+    items: List[MessageResponse]
+    next_cursor: Optional[str]
+
+
 class MessageResponseRequest(BaseModel):
     message_id: str
     response: str
@@ -234,6 +273,36 @@ class MentorFeedbackResponse(BaseModel):
         from_attributes = True
 
 
+# Parent Overview Schemas
+class ChildOverview(BaseModel):
+    id: str
+    name: str
+    mentee_number: Optional[str]
+    current_week: Optional[int]
+    completed_weeks: List[int]
+    progress_percent: int
+    mentor_id: Optional[str]
+    mentor_name: Optional[str]
+    latest_approval: Optional[WeekApprovalResponse]
+    recent_feedback: List[MentorFeedbackResponse]
+    pending_messages: List[MessageResponse]
+
+
+# Timeline Schemas
+class TimelineEvent(BaseModel):
+    kind: str
+    occurred_at: datetime
+    approval: Optional[WeekApprovalResponse] = None
+    feedback: Optional[MentorFeedbackResponse] = None
+    review: Optional[AdminReviewResponse] = None
+    message: Optional[MessageResponse] = None
+
+
+class TimelinePage(BaseModel):
+    items: List[TimelineEvent]
+    next_cursor: Optional[str]
+
+
 # Analytics Schemas
 class DashboardStats(BaseModel):
     total_users: int
@@ -247,6 +316,43 @@ class DashboardStats(BaseModel):
     average_progress: int
 
 
+class HeatmapRow(BaseModel):
+    id: str
+    name: str
+    mentee_number: Optional[str]
+    weeks: str  # base64 of the completed-weeks mask, 5 bytes little-endian, week n = bit n - 1
+
+
+class HeatmapResponse(BaseModel):
+    total_weeks: int
+    mentees: List[HeatmapRow]
+
+
+class ApprovalRollup(BaseModel):
+    period: str
+    period_start: date
+    submitted: int
+    approved: int
+    rejected: int
+    active_mentees: int
+
+
+class MentorLatencyStats(BaseModel):
+    mentor_id: str
+    decisions: int
+    p50_seconds: float
+    p90_seconds: float
+    p99_seconds: float
+
+
+class MentorLatencyRollup(BaseModel):
+    period: str
+    period_start: date
+    mentor_id: str
+    decisions: int
+    median_latency_seconds: float
+
+
 # Notification Schemas
 class NotificationResponse(BaseModel):
     id: str
@@ -256,3 +362,8 @@ class NotificationResponse(BaseModel):
     created_at: datetime
     read: bool
 
+
+class NotificationCounts(BaseModel):
+    approvals: int
+    messages: int
+    total: int
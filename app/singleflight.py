@@ -0,0 +1,50 @@
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from .metrics import register_metrics
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result (or exception) instead of issuing their
+    own. The call runs as its own task, so a disconnecting first caller does
+    not cancel it for the others. Nothing is kept once it completes; caching
+    is left to the caller. Per-key stats can be turned off for callers
+    whose keys are unbounded.
+    """
+
+    def __init__(self, track_stats: bool = True):
+        self.track_stats = track_stats
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._calls: Dict[Hashable, int] = defaultdict(int)
+        self._executions: Dict[Hashable, int] = defaultdict(int)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        if self.track_stats:
+            self._calls[key] += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            if self.track_stats:
+                self._executions[key] += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            str(key): {
+                "calls": calls,
+                "executions": self._executions[key],
+                "collapsed": calls - self._executions[key],
+                "in_flight": int(key in self._in_flight),
+            }
+            for key, calls in self._calls.items()
+        }
+
+
+single_flight = SingleFlight()
+register_metrics("single_flight", single_flight.stats)
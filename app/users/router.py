@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
-from ..database import get_supabase
-from supabase import Client
-from ..schemas import UserCreate, UserUpdate, UserResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+from ..database import get_supabase, Client
+from ..schemas import (
+    UserCreate, UserUpdate, UserResponse, UserUpdateResponse, UserSearchResult,
+    ChildOverview, MentorFeedbackResponse, MessageResponse, WeekApprovalResponse,
+    AdminReviewResponse, TimelineEvent, TimelinePage
+)
 from ..dependencies import get_current_admin, get_current_user, get_current_mentor, get_current_mentee, get_current_parent
-from ..auth.utils import get_password_hash
+from ..auth.utils import (
+    get_password_hash_async, create_access_token, create_refresh_token, token_claims_for, MAX_TOKEN_LIFETIME_SECONDS
+)
+from ..auth.revocation import revoked_tokens
+from ..curriculum.progress import TOTAL_WEEKS, completed_count, mask_to_weeks
+from .timeline import TIMELINE_SOURCES, Cursor, decode_cursor, encode_cursor, keyset_filter, merge_pages
+from .utils import get_user_names
+import asyncio
 import uuid
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+PARENT_OVERVIEW_FEEDBACK_LIMIT = 3
+PARENT_OVERVIEW_MESSAGE_LIMIT = 10
+
 
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users(
@@ -16,7 +31,7 @@ async def get_all_users(
     supabase: Client = Depends(get_supabase)
 ):
     """Get all users (admin only)"""
-    response = supabase.table("users").select("*").execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
@@ -26,7 +41,7 @@ async def get_mentees(
     supabase: Client = Depends(get_supabase)
 ):
     """Get all mentees (admin only)"""
-    response = supabase.table("users").select("*").eq("role", "mentee").execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "mentee").execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
@@ -36,7 +51,7 @@ async def get_mentors(
     supabase: Client = Depends(get_supabase)
 ):
     """Get all mentors (admin only)"""
-    response = supabase.table("users").select("*").eq("role", "mentor").execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "mentor").execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
@@ -46,10 +61,27 @@ async def get_parents(
     supabase: Client = Depends(get_supabase)
 ):
     """Get all parents (admin only)"""
-    response = supabase.table("users").select("*").eq("role", "parent").execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "parent").execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
+@router.get("/search", response_model=List[UserSearchResult])
+async def search_users(
+    q: str = Query(..., min_length=1),
+    role: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Dict[str, Any] = Depends(get_current_admin),
+    supabase: Client = Depends(get_supabase)
+):
+    """Search users by name, email or member number (admin only)"""
+    # Sent as GET (query string), where null cannot be expressed; an omitted role defaults to NULL
+    params = {"search_query": q.strip(), "result_limit": limit}
+    if role:
+        params["search_role"] = role
+    response = await run_in_threadpool(supabase.rpc("search_users", params, get=True).execute)
+    return [UserSearchResult.model_validate(user) for user in response.data]
+
+
 @router.post("/mentees", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_mentee(
     mentee_data: UserCreate,
@@ -57,7 +89,7 @@ async def create_mentee(
     supabase: Client = Depends(get_supabase)
 ):
     """Create a new mentee (admin only)"""
-    existing_response = supabase.table("users").select("*").eq("email", mentee_data.email).execute()
+    existing_response = await run_in_threadpool(supabase.table("users").select("*").eq("email", mentee_data.email).execute)
     if existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,7 +97,7 @@ async def create_mentee(
         )
     
     if not mentee_data.mentee_number:
-        mentees_response = supabase.table("users").select("mentee_number").eq("role", "mentee").execute()
+        mentees_response = await run_in_threadpool(supabase.table("users").select("mentee_number").eq("role", "mentee").execute)
         if mentees_response.data:
             numbers = [int(m["mentee_number"].replace("MN", "")) for m in mentees_response.data if m.get("mentee_number") and m["mentee_number"] and m["mentee_number"].startswith("MN")]
             next_num = max(numbers) + 1 if numbers else 1
@@ -79,7 +111,7 @@ async def create_mentee(
         "id": str(uuid.uuid4()),
         "name": mentee_data.name,
         "email": mentee_data.email,
-        "password": get_password_hash(mentee_data.password),
+        "password": await get_password_hash_async(mentee_data.password),
         "role": "mentee",
         "profile_picture": mentee_data.profile_picture,
         "mentee_number": mentee_number,
@@ -91,7 +123,7 @@ async def create_mentee(
         "parent_phone": mentee_data.parent_phone
     }
     
-    response = supabase.table("users").insert(user_data).execute()
+    response = await run_in_threadpool(supabase.table("users").insert(user_data).execute)
     return UserResponse.model_validate(response.data[0])
 
 
@@ -102,7 +134,7 @@ async def create_mentor(
     supabase: Client = Depends(get_supabase)
 ):
     """Create a new mentor (admin only)"""
-    existing_response = supabase.table("users").select("*").eq("email", mentor_data.email).execute()
+    existing_response = await run_in_threadpool(supabase.table("users").select("*").eq("email", mentor_data.email).execute)
     if existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -110,7 +142,7 @@ async def create_mentor(
         )
     
     if not mentor_data.membership_number:
-        mentors_response = supabase.table("users").select("membership_number").eq("role", "mentor").execute()
+        mentors_response = await run_in_threadpool(supabase.table("users").select("membership_number").eq("role", "mentor").execute)
         if mentors_response.data:
             numbers = [int(m["membership_number"].replace("MEM", "")) for m in mentors_response.data if m.get("membership_number") and m["membership_number"] and m["membership_number"].startswith("MEM")]
             next_num = max(numbers) + 1 if numbers else 1
@@ -124,7 +156,7 @@ async def create_mentor(
         "id": str(uuid.uuid4()),
         "name": mentor_data.name,
         "email": mentor_data.email,
-        "password": get_password_hash(mentor_data.password),
+        "password": await get_password_hash_async(mentor_data.password),
         "role": "mentor",
         "profile_picture": mentor_data.profile_picture,
         "membership_number": membership_number,
@@ -133,7 +165,7 @@ async def create_mentor(
         "assigned_mentees": mentor_data.assigned_mentees or []
     }
     
-    response = supabase.table("users").insert(user_data).execute()
+    response = await run_in_threadpool(supabase.table("users").insert(user_data).execute)
     return UserResponse.model_validate(response.data[0])
 
 
@@ -144,7 +176,7 @@ async def create_parent(
     supabase: Client = Depends(get_supabase)
 ):
     """Create a new parent (admin only)"""
-    existing_response = supabase.table("users").select("*").eq("email", parent_data.email).execute()
+    existing_response = await run_in_threadpool(supabase.table("users").select("*").eq("email", parent_data.email).execute)
     if existing_response.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -155,14 +187,14 @@ async def create_parent(
         "id": str(uuid.uuid4()),
         "name": parent_data.name,
         "email": parent_data.email,
-        "password": get_password_hash(parent_data.password),
+        "password": await get_password_hash_async(parent_data.password),
         "role": "parent",
         "profile_picture": parent_data.profile_picture,
         "phone": parent_data.phone,
         "children": parent_data.children or []
     }
     
-    response = supabase.table("users").insert(user_data).execute()
+    response = await run_in_threadpool(supabase.table("users").insert(user_data).execute)
     return UserResponse.model_validate(response.data[0])
 
 
@@ -173,7 +205,7 @@ async def get_user(
     supabase: Client = Depends(get_supabase)
 ):
     """Get user by ID"""
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", user_id).execute)
     if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -190,7 +222,7 @@ async def get_user(
     return UserResponse.model_validate(user)
 
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put("/{user_id}", response_model=UserUpdateResponse)
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
@@ -198,7 +230,7 @@ async def update_user(
     supabase: Client = Depends(get_supabase)
 ):
     """Update user (admin or self)"""
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", user_id).execute)
     if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -211,9 +243,21 @@ async def update_user(
             detail="Not enough permissions"
         )
     
+    user = response.data[0]
     update_data = user_data.model_dump(exclude_unset=True)
-    response = supabase.table("users").update(update_data).eq("id", user_id).execute()
-    return UserResponse.model_validate(response.data[0])
+    response = await run_in_threadpool(supabase.table("users").update(update_data).eq("id", user_id).execute)
+    updated = response.data[0]
+    # Tokens carry email and role as claims; permission checks must not keep using the old values
+    if any(field in update_data and update_data[field] != user.get(field) for field in ("email", "role")):
+        revoked_tokens.revoke_user(user_id, MAX_TOKEN_LIFETIME_SECONDS)
+        if current_user.get("id") == user_id:
+            # The caller's own token was just revoked; hand out a pair with the new claims
+            return UserUpdateResponse.model_validate({
+                **updated,
+                "token": create_access_token(data=token_claims_for(updated)),
+                "refresh_token": create_refresh_token(data={"sub": user_id})
+            })
+    return UserUpdateResponse.model_validate(updated)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -223,24 +267,112 @@ async def delete_user(
     supabase: Client = Depends(get_supabase)
 ):
     """Delete user (admin only)"""
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("id", user_id).execute)
     if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    supabase.table("users").delete().eq("id", user_id).execute()
+    await run_in_threadpool(supabase.table("users").delete().eq("id", user_id).execute)
+    revoked_tokens.revoke_user(user_id, MAX_TOKEN_LIFETIME_SECONDS)
     return None
 
 
+def _fetch_timeline_source(supabase: Client, kind: str, user_id: str, cursor: Optional[Cursor], limit: int) -> List[Dict[str, Any]]:
+    """One newest-first page of a timeline source, starting after the cursor"""
+    table, column = TIMELINE_SOURCES[kind]
+    query = supabase.table(table).select("*")
+    after = keyset_filter(kind, cursor)
+    if kind == "message":
+        # Only week-tagged messages, sent or received by the mentee
+        participant = f"from_id.eq.{user_id},to_id.eq.{user_id}"
+        query = query.not_.is_("week_number", "null").or_(f"and(or({participant}),{after})" if after else participant)
+    else:
+        query = query.eq("mentee_id", user_id)
+        if after:
+            query = query.or_(after)
+    return query.order(column, desc=True).order("id", desc=True).limit(limit).execute().data
+
+
+@router.get("/{user_id}/timeline", response_model=TimelinePage)
+async def get_user_timeline(
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get a mentee's approvals, feedback, reviews and week messages, newest first (admin, self, mentor or parent)"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    response = await run_in_threadpool(
+        supabase.table("users").select("id, name, role, mentor_id, parent_email").eq("id", user_id).execute
+    )
+    if not response.data or response.data[0].get("role") != "mentee":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Mentee not found"
+        )
+    mentee = response.data[0]
+    role = current_user.get("role")
+    if not (
+        role == "admin"
+        or current_user.get("id") == user_id
+        or (role == "mentor" and mentee.get("mentor_id") == current_user.get("id"))
+        or (role == "parent" and mentee.get("parent_email") == current_user.get("email"))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # One page per source (plus one row to detect a next page), fetched concurrently, then merged
+    pages = await asyncio.gather(*(
+        run_in_threadpool(_fetch_timeline_source, supabase, kind, user_id, after, limit + 1)
+        for kind in TIMELINE_SOURCES
+    ))
+    events, next_cursor = merge_pages(dict(zip(TIMELINE_SOURCES, pages)), limit)
+    
+    names = await run_in_threadpool(get_user_names, supabase, [
+        row.get(key) for _, row in events for key in ("mentor_id", "reviewer_id", "from_id", "to_id")
+    ])
+    names[user_id] = mentee["name"]
+    
+    items = []
+    for kind, row in events:
+        if kind == "approval":
+            item = TimelineEvent(kind=kind, occurred_at=row["submitted_at"], approval=WeekApprovalResponse.model_validate(row))
+        elif kind == "feedback":
+            item = TimelineEvent(kind=kind, occurred_at=row["created_at"], feedback=MentorFeedbackResponse.model_validate({
+                **row, "mentee_name": mentee["name"], "mentor_name": names.get(row["mentor_id"], "Unknown")
+            }))
+        elif kind == "review":
+            item = TimelineEvent(kind=kind, occurred_at=row["created_at"], review=AdminReviewResponse.model_validate({
+                **row, "mentee_name": mentee["name"], "reviewer_name": names.get(row["reviewer_id"], "Unknown")
+            }))
+        else:
+            item = TimelineEvent(kind=kind, occurred_at=row["created_at"], message=MessageResponse.model_validate({
+                **row, "from_name": names.get(row["from_id"], "Unknown"), "to_name": names.get(row["to_id"], "Unknown")
+            }))
+        items.append(item)
+    
+    return TimelinePage(items=items, next_cursor=encode_cursor(next_cursor) if next_cursor else None)
+
+
 @router.get("/mentor/mentees", response_model=List[UserResponse])
 async def get_assigned_mentees(
     current_user: Dict[str, Any] = Depends(get_current_mentor),
     supabase: Client = Depends(get_supabase)
 ):
     """Get mentees assigned to current mentor"""
-    response = supabase.table("users").select("*").eq("role", "mentee").eq("mentor_id", current_user.get("id")).execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "mentee").eq("mentor_id", current_user.get("id")).execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
@@ -250,10 +382,98 @@ async def get_children(
     supabase: Client = Depends(get_supabase)
 ):
     """Get children of current parent"""
-    response = supabase.table("users").select("*").eq("role", "mentee").eq("parent_email", current_user.get("email")).execute()
+    response = await run_in_threadpool(supabase.table("users").select("*").eq("role", "mentee").eq("parent_email", current_user.get("email")).execute)
     return [UserResponse.model_validate(user) for user in response.data]
 
 
+@router.get("/parent/overview", response_model=List[ChildOverview])
+async def get_parent_overview(
+    current_user: Dict[str, Any] = Depends(get_current_parent),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get every child's progress, latest approval, recent feedback and pending messages"""
+    children = (await run_in_threadpool(
+        supabase.table("users")
+        .select("id, name, mentee_number, current_week, completed_weeks_mask, mentor_id")
+        .eq("role", "mentee").eq("parent_email", current_user.get("email"))
+        .order("name").execute
+    )).data
+    if not children:
+        return []
+    
+    # One batched query per table for all children, run concurrently
+    child_ids = [child["id"] for child in children]
+    id_list = ",".join(child_ids)
+    approvals, feedback, messages = await asyncio.gather(
+        run_in_threadpool(
+            supabase.table("week_approvals").select("*").in_("mentee_id", child_ids)
+            .order("submitted_at", desc=True).execute
+        ),
+        run_in_threadpool(
+            supabase.table("mentor_feedbacks").select("*").in_("mentee_id", child_ids)
+            .order("created_at", desc=True).execute
+        ),
+        run_in_threadpool(
+            supabase.table("messages").select("*").eq("status", "awaiting_response")
+            .or_(f"from_id.in.({id_list}),to_id.in.({id_list})")
+            .order("created_at", desc=True).execute
+        )
+    )
+    
+    latest_approval: Dict[str, Dict[str, Any]] = {}
+    for approval in approvals.data:
+        latest_approval.setdefault(approval["mentee_id"], approval)
+    feedback_by_child: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for item in feedback.data:
+        if len(feedback_by_child[item["mentee_id"]]) < PARENT_OVERVIEW_FEEDBACK_LIMIT:
+            feedback_by_child[item["mentee_id"]].append(item)
+    messages_by_child: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for message in messages.data:
+        for child_id in {message["from_id"], message["to_id"]} & set(child_ids):
+            if len(messages_by_child[child_id]) < PARENT_OVERVIEW_MESSAGE_LIMIT:
+                messages_by_child[child_id].append(message)
+    
+    names = await run_in_threadpool(get_user_names, supabase, [
+        *(child.get("mentor_id") for child in children),
+        *(item["mentor_id"] for item in feedback.data),
+        *(user_id for message in messages.data for user_id in (message["from_id"], message["to_id"]))
+    ])
+    names.update({child["id"]: child["name"] for child in children})
+    
+    result = []
+    for child in children:
+        mask = child.get("completed_weeks_mask") or 0
+        approval = latest_approval.get(child["id"])
+        result.append(ChildOverview(
+            id=child["id"],
+            name=child["name"],
+            mentee_number=child.get("mentee_number"),
+            current_week=child.get("current_week"),
+            completed_weeks=mask_to_weeks(mask),
+            progress_percent=round(completed_count(mask) / TOTAL_WEEKS * 100),
+            mentor_id=child.get("mentor_id"),
+            mentor_name=names.get(child.get("mentor_id")),
+            latest_approval=WeekApprovalResponse.model_validate(approval) if approval else None,
+            recent_feedback=[
+                MentorFeedbackResponse.model_validate({
+                    **item,
+                    "mentee_name": child["name"],
+                    "mentor_name": names.get(item["mentor_id"], "Unknown")
+                })
+                for item in feedback_by_child[child["id"]]
+            ],
+            pending_messages=[
+                MessageResponse.model_validate({
+                    **message,
+                    "from_name": names.get(message["from_id"], "Unknown"),
+                    "to_name": names.get(message["to_id"], "Unknown")
+                })
+                for message in messages_by_child[child["id"]]
+            ]
+        ))
+    return result
+
+
 @router.post("/assign/{mentee_id}/{mentor_id}")
 async def assign_mentee_to_mentor(
     mentee_id: str,
@@ -262,8 +482,8 @@ async def assign_mentee_to_mentor(
     supabase: Client = Depends(get_supabase)
 ):
     """Assign mentee to mentor (admin only)"""
-    mentee_response = supabase.table("users").select("*").eq("id", mentee_id).eq("role", "mentee").execute()
-    mentor_response = supabase.table("users").select("*").eq("id", mentor_id).eq("role", "mentor").execute()
+    mentee_response = await run_in_threadpool(supabase.table("users").select("*").eq("id", mentee_id).eq("role", "mentee").execute)
+    mentor_response = await run_in_threadpool(supabase.table("users").select("*").eq("id", mentor_id).eq("role", "mentor").execute)
     
     if not mentee_response.data or not mentor_response.data:
         raise HTTPException(
@@ -275,18 +495,18 @@ async def assign_mentee_to_mentor(
     mentor = mentor_response.data[0]
     
     if mentee.get("mentor_id"):
-        prev_mentor_response = supabase.table("users").select("assigned_mentees").eq("id", mentee["mentor_id"]).execute()
+        prev_mentor_response = await run_in_threadpool(supabase.table("users").select("assigned_mentees").eq("id", mentee["mentor_id"]).execute)
         if prev_mentor_response.data:
             prev_mentor = prev_mentor_response.data[0]
             assigned_mentees = prev_mentor.get("assigned_mentees", []) or []
             assigned_mentees = [m for m in assigned_mentees if m != mentee_id]
-            supabase.table("users").update({"assigned_mentees": assigned_mentees}).eq("id", mentee["mentor_id"]).execute()
+            await run_in_threadpool(supabase.table("users").update({"assigned_mentees": assigned_mentees}).eq("id", mentee["mentor_id"]).execute)
     
-    supabase.table("users").update({"mentor_id": mentor_id}).eq("id", mentee_id).execute()
+    await run_in_threadpool(supabase.table("users").update({"mentor_id": mentor_id}).eq("id", mentee_id).execute)
     
     assigned_mentees = mentor.get("assigned_mentees", []) or []
     if mentee_id not in assigned_mentees:
         assigned_mentees.append(mentee_id)
-    supabase.table("users").update({"assigned_mentees": assigned_mentees}).eq("id", mentor_id).execute()
+    await run_in_threadpool(supabase.table("users").update({"assigned_mentees": assigned_mentees}).eq("id", mentor_id).execute)
     
     return {"message": "Mentee assigned successfully"}
@@ -0,0 +1,71 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def _user_keys(user: Dict[str, Any]) -> List[str]:
+    """Searchable keys of a user: each name word, the email and member numbers"""
+    keys = [word for word in (user.get("name") or "").lower().split()]
+    for field in ("email", "mentee_number", "membership_number"):
+        if user.get(field):
+            keys.append(user[field].lower())
+    return keys
+
+
+def to_search_result(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a users row to the fields returned by directory search"""
+    return {
+        "id": user["id"],
+        "name": user["name"],
+        "number": user.get("mentee_number") or user.get("membership_number"),
+        "role": user["role"],
+    }
+
+
+class UserPrefixIndex:
+    """
+    In-memory prefix index over the user directory, the local counterpart of
+    the search_users RPC (which matches substrings through pg_trgm). Keys
+    are kept in one sorted list so a prefix lookup is a bisect plus a short
+    scan.
+    """
+
+    def __init__(self, users: Iterable[Dict[str, Any]] = ()):
+        self._users: Dict[str, Dict[str, Any]] = {}
+        entries = []
+        for user in users:
+            self._users[user["id"]] = to_search_result(user)
+            entries.extend((key, user["id"]) for key in _user_keys(user))
+        entries.sort()
+        self._keys: List[Tuple[str, str]] = entries
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add(self, user: Dict[str, Any]) -> None:
+        if user["id"] in self._users:
+            self.remove(user["id"])
+        self._users[user["id"]] = to_search_result(user)
+        for key in _user_keys(user):
+            insort(self._keys, (key, user["id"]))
+
+    def remove(self, user_id: str) -> None:
+        if self._users.pop(user_id, None) is None:
+            return
+        self._keys = [entry for entry in self._keys if entry[1] != user_id]
+
+    def search(self, query: str, role: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to limit users with a key starting with query, in key order"""
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        matches: Dict[str, Dict[str, Any]] = {}
+        position = bisect_left(self._keys, (prefix, ""))
+        while position < len(self._keys) and len(matches) < limit:
+            key, user_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            user = self._users[user_id]
+            if role is None or user["role"] == role:
+                matches.setdefault(user_id, user)
+            position += 1
+        return list(matches.values())
@@ -0,0 +1,80 @@
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import base64
+import heapq
+import json
+
+# Event kind -> (table, timestamp column). Each source is read newest first, ordered by
+# (timestamp, id), and events from different sources are ordered by (timestamp, kind, id).
+TIMELINE_SOURCES = {
+    "approval": ("week_approvals", "submitted_at"),
+    "feedback": ("mentor_feedbacks", "created_at"),
+    "message": ("messages", "created_at"),
+    "review": ("admin_reviews", "created_at"),
+}
+
+Cursor = Tuple[str, str, str]  # (timestamp, kind, id) of the last event returned
+
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def decode_cursor(encoded: str) -> Cursor:
+    """Raise ValueError for anything that is not a cursor from encode_cursor"""
+    try:
+        timestamp, kind, event_id = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        parse_timestamp(timestamp)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if kind not in TIMELINE_SOURCES or not isinstance(event_id, str):
+        raise ValueError("Invalid cursor")
+    return timestamp, kind, event_id
+
+
+def keyset_filter(kind: str, cursor: Optional[Cursor]) -> Optional[str]:
+    """
+    PostgREST logic filter for the events of a source that come after the
+    cursor, or None on the first page.
+
+    Ties on the timestamp are broken by kind, then id, so a source sorting
+    before the cursor's kind keeps its events at the cursor's timestamp and
+    one sorting after it drops them.
+    """
+    if cursor is None:
+        return None
+    timestamp, cursor_kind, event_id = cursor
+    column = TIMELINE_SOURCES[kind][1]
+    if kind < cursor_kind:
+        return f'{column}.lte."{timestamp}"'
+    if kind > cursor_kind:
+        return f'{column}.lt."{timestamp}"'
+    return f'or({column}.lt."{timestamp}",and({column}.eq."{timestamp}",id.lt."{event_id}"))'
+
+
+def _keyed(kind: str, rows: Iterable[Dict[str, Any]]):
+    column = TIMELINE_SOURCES[kind][1]
+    for row in rows:
+        yield (parse_timestamp(row[column]), kind, row["id"]), kind, row
+
+
+def merge_pages(pages: Mapping[str, Sequence[Dict[str, Any]]], limit: int) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[Cursor]]:
+    """
+    Lazily k-way merge one newest-first page per source into a single page.
+
+    Every page must hold up to `limit` + 1 events after the cursor, so the
+    extra one tells whether another page follows; only the first `limit` + 1
+    merged events are consumed. Returns the (kind, row) events and the
+    cursor of the next page, or None if this is the last.
+    """
+    merged = heapq.merge(*(_keyed(kind, rows) for kind, rows in pages.items()), key=lambda event: event[0], reverse=True)
+    events = [(kind, row) for _, kind, row in islice(merged, limit + 1)]
+    if len(events) <= limit:
+        return events, None
+    kind, row = events[limit - 1]
+    return events[:limit], (row[TIMELINE_SOURCES[kind][1]], kind, row["id"])
@@ -0,0 +1,11 @@
+from typing import Dict, Iterable
+from ..database import Client
+
+
+def get_user_names(supabase: Client, user_ids: Iterable[str]) -> Dict[str, str]:
+    """Resolve user ids to names with a single batched query"""
+    ids = list({user_id for user_id in user_ids if user_id})
+    if not ids:
+        return {}
+    response = supabase.table("users").select("id, name").in_("id", ids).execute()
+    return {user["id"]: user["name"] for user in response.data}
@@ -0,0 +1,74 @@
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from typing import Callable, Dict, List, Tuple
+from .auth.utils import get_password_hash
+from .curriculum.router import fetch_curriculum
+from .database import init_supabase
+from .schemas import UserResponse, MessageResponse, WeekApprovalResponse
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_USER = {
+    "id": "warm-up", "name": "Warm Up", "email": "warm-up@example.com", "role": "mentee",
+    "profile_picture": None, "mentee_number": "MN000", "current_week": 1, "completed_weeks": [1],
+    "mentor_id": None, "parent_email": "parent@example.com", "parent_name": None, "parent_phone": None,
+    "membership_number": None, "specialization": None, "bio": None, "assigned_mentees": None,
+    "phone": None, "children": None, "created_at": "2024-01-01T00:00:00+00:00"
+}
+
+_SAMPLE_MESSAGE = {
+    "id": "warm-up", "from_id": "a", "from_name": "A", "to_id": "b", "to_name": "B",
+    "subject": "Warm up", "content": "Warm up", "type": "parent_to_mentor", "status": "awaiting_response",
+    "week_number": 1, "parent_message_id": None, "response": None, "responded_at": None,
+    "created_at": "2024-01-01T00:00:00+00:00"
+}
+
+_SAMPLE_APPROVAL = {
+    "id": "warm-up", "mentee_id": "a", "week_number": 1, "status": "pending",
+    "submitted_at": "2024-01-01T00:00:00+00:00", "mentor_id": "b", "mentor_feedback": None,
+    "approved_at": None, "mentee_comment": None, "mentee_comment_at": None
+}
+
+
+class WarmupState:
+    """Progress of the lifespan warm-up; /health holds traffic until it completes"""
+
+    def __init__(self):
+        self.ready = False
+        self.durations_ms: Dict[str, float] = {}
+        self.failed: List[str] = []
+
+
+warmup_state = WarmupState()
+
+
+def _build_validators() -> None:
+    # First validation pulls in lazy pieces such as email-validator and datetime parsing
+    UserResponse.model_validate(_SAMPLE_USER).model_dump(mode="json")
+    MessageResponse.model_validate(_SAMPLE_MESSAGE).model_dump(mode="json")
+    WeekApprovalResponse.model_validate(_SAMPLE_APPROVAL).model_dump(mode="json")
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Run the warm-up steps in the threadpool, then mark the instance ready"""
+    steps: List[Tuple[str, Callable[[], object]]] = [
+        # Also opens the first HTTP connection to PostgREST
+        ("curriculum", lambda: fetch_curriculum(init_supabase())),
+        ("validators", _build_validators),
+        ("openapi", app.openapi),
+        ("password_hash", lambda: get_password_hash("warm-up")),
+    ]
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(step)
+        except Exception:
+            # A failed step only means a slower first request; never keep the instance out
+            logger.exception("Warm-up step %s failed", name)
+            warmup_state.failed.append(name)
+        warmup_state.durations_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    warmup_state.ready = True
+    logger.info("Warm-up finished: %s", warmup_state.durations_ms)
@@ -0,0 +1,66 @@
+"""
+Benchmark access token verification
+
+Compares python-jose (used by the app) with PyJWT for the HS256 tokens
+produced by create_access_token, and both against the verified-token cache
+used by get_current_user.
+
+Run from the project root:
+    python -m benchmarks.jwt_benchmark
+"""
+import argparse
+import time
+
+from jose import jwt as jose_jwt
+
+from app.auth.utils import SECRET_KEY, ALGORITHM, create_access_token, token_claims_for
+from app.dependencies import decode_token, verified_tokens
+
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+USER = {"id": "3f8a2c1e-benchmark", "role": "mentee", "name": "Benchmark User", "email": "bench@example.com"}
+
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    claims = token_claims_for(USER)
+    token = create_access_token(data=claims)
+
+    results = {
+        "jose encode": time_per_call(lambda: create_access_token(data=claims), args.iterations),
+        "jose decode": time_per_call(lambda: jose_jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), args.iterations),
+    }
+    if pyjwt is not None:
+        payload = jose_jwt.get_unverified_claims(token)
+        results["pyjwt encode"] = time_per_call(lambda: pyjwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM), args.iterations)
+        results["pyjwt decode"] = time_per_call(lambda: pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), args.iterations)
+
+    def uncached_decode():
+        verified_tokens.clear()
+        decode_token(token)
+
+    results["decode_token (cold cache)"] = time_per_call(uncached_decode, args.iterations)
+    decode_token(token)
+    results["decode_token (cached)"] = time_per_call(lambda: decode_token(token), args.iterations)
+
+    for name, micros in results.items():
+        print(f"{name:<28}{micros:>9.1f} us/op")
+    if pyjwt is None:
+        print("PyJWT not installed; pip install pyjwt to compare")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the in-memory message search index
+
+Run from the project root:
+    python -m benchmarks.search_benchmark --messages 100000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.messages.search import MessageSearchIndex
+
+WORDS = (
+    "week bloc art music rhythm drawing colour sound progress feedback practice "
+    "talent sensory painting melody review question homework session mentor parent "
+    "schedule activity outcome indicator digital project story dance listening"
+).split()
+
+
+def make_message(users):
+    from_id, to_id = random.sample(users, 2)
+    return {
+        "id": str(uuid.uuid4()),
+        "from_id": from_id,
+        "to_id": to_id,
+        "subject": " ".join(random.choices(WORDS, k=4)),
+        "content": " ".join(random.choices(WORDS, k=40)),
+        "response": " ".join(random.choices(WORDS, k=20)) if random.random() < 0.5 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+    messages = [make_message(users) for _ in range(args.messages)]
+
+    index = MessageSearchIndex()
+    start = time.perf_counter()
+    for message in messages:
+        index.add(message)
+    build_seconds = time.perf_counter() - start
+
+    timings = []
+    for _ in range(args.queries):
+        user_id = random.choice(users)
+        query = " ".join(random.sample(WORDS, 2))
+        start = time.perf_counter()
+        index.search(user_id, query, limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"indexed {len(index)} messages in {build_seconds:.2f}s")
+    print(f"search p50={statistics.median(timings):.2f}ms "
+          f"p99={timings[int(len(timings) * 0.99) - 1]:.2f}ms "
+          f"max={timings[-1]:.2f}ms over {args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the in-memory user directory prefix index
+
+Run from the project root:
+    python -m benchmarks.user_search_benchmark --users 100000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+import uuid
+
+from app.users.search import UserPrefixIndex
+
+ROLES = ["mentee"] * 8 + ["mentor", "parent"]
+
+
+def random_name():
+    return " ".join(
+        random.choice(string.ascii_uppercase) + "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 8)))
+        for _ in range(2)
+    )
+
+
+def make_users(count):
+    users = []
+    for i in range(count):
+        role = random.choice(ROLES)
+        name = random_name()
+        users.append({
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "email": f"{name.replace(' ', '.').lower()}{i}@example.com",
+            "role": role,
+            "mentee_number": f"MN{i:06d}" if role == "mentee" else None,
+            "membership_number": f"MEM{i:06d}" if role == "mentor" else None,
+        })
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    users = make_users(args.users)
+
+    start = time.perf_counter()
+    index = UserPrefixIndex(users)
+    build_seconds = time.perf_counter() - start
+
+    timings = []
+    for _ in range(args.queries):
+        user = random.choice(users)
+        query = user["name"][:random.randint(1, 4)]
+        role = random.choice([None, "mentee", "mentor"])
+        start = time.perf_counter()
+        index.search(query, role=role, limit=10)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"indexed {len(index)} users in {build_seconds:.2f}s")
+    print(f"search p50={statistics.median(timings):.3f}ms "
+          f"p99={timings[int(len(timings) * 0.99) - 1]:.3f}ms "
+          f"max={timings[-1]:.3f}ms over {args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
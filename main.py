@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
+import asyncio
+import math
 import os
 
 # Load environment variables from .env file
@@ -13,16 +17,47 @@ from app.approvals.router import router as approvals_router
 from app.messages.router import router as messages_router
 from app.notifications.router import router as notifications_router
 from app.analytics.router import router as analytics_router
+from app.health.router import router as health_router
+from app.health.probes import loop_lag_monitor
+from app.analytics.rollups import rollup_scheduler
+from app.database import init_supabase
+from app.metrics import collect_metrics
+from app.postgres import postgres
+from app.resilience import DatabaseUnavailable, DeadlineMiddleware
+from app.concurrency import ConcurrencyLimitMiddleware, concurrency_limiters
+from app.warmup import warm_up, warmup_state
 
 # Note: Database tables are created in Supabase
 # Run supabase_schema.sql in Supabase SQL Editor to create tables
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The Supabase client is created here rather than at import time
+    init_supabase()
+    # Only opens a pool when DATA_BACKEND=asyncpg
+    await postgres.connect()
+    loop_lag_monitor.start()
+    rollup_scheduler.start()
+    # Warm up in the background; /health reports not ready until it is done
+    warmup_task = asyncio.create_task(warm_up(app))
+    yield
+    warmup_task.cancel()
+    loop_lag_monitor.stop()
+    rollup_scheduler.stop()
+    await postgres.close()
+
+
 app = FastAPI(
     title="Curriculum Development API",
     description="Backend API for Curriculum Development Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Load shedding: added first so it runs inside CORS and its 503s carry CORS headers
+app.add_middleware(ConcurrencyLimitMiddleware, limiters=concurrency_limiters)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +67,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Every request gets a time budget shared by all of its database calls
+app.add_middleware(DeadlineMiddleware)
+
+
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailable):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -40,6 +88,7 @@ app.include_router(approvals_router)
 app.include_router(messages_router)
 app.include_router(notifications_router)
 app.include_router(analytics_router)
+app.include_router(health_router)
 
 
 @app.get("/")
@@ -53,9 +102,19 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    if not warmup_state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming_up"}
+        )
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return collect_metrics()
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -36,6 +36,46 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS idx_users_mentor_id ON users(mentor_id);
+CREATE INDEX IF NOT EXISTS idx_users_parent_email ON users(parent_email);
+CREATE INDEX IF NOT EXISTS idx_users_mentee_number ON users(mentee_number);
+CREATE INDEX IF NOT EXISTS idx_users_membership_number ON users(membership_number);
+
+-- Completed weeks as a bitmask (week n = bit n - 1), derived from completed_weeks by a trigger
+-- so progress queries are integer bit operations instead of JSONB array scans
+ALTER TABLE users ADD COLUMN IF NOT EXISTS completed_weeks_mask BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION weeks_mask(weeks JSONB)
+RETURNS BIGINT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT COALESCE(bit_or(1::BIGINT << (w::INTEGER - 1)), 0)
+    FROM jsonb_array_elements_text(COALESCE(weeks, '[]'::jsonb)) AS w
+    WHERE w::INTEGER BETWEEN 1 AND 36;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_completed_weeks_mask()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.completed_weeks_mask := weeks_mask(NEW.completed_weeks);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS users_completed_weeks_mask ON users;
+CREATE TRIGGER users_completed_weeks_mask
+    BEFORE INSERT OR UPDATE OF completed_weeks ON users
+    FOR EACH ROW EXECUTE FUNCTION sync_completed_weeks_mask();
+
+-- Backfill rows written before the column existed
+UPDATE users SET completed_weeks_mask = weeks_mask(completed_weeks)
+WHERE completed_weeks_mask <> weeks_mask(completed_weeks);
+
+-- Trigram indexes for directory search (substring matches on name/email)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
 
 -- Week Activities table
 CREATE TABLE IF NOT EXISTS week_activities (
@@ -66,6 +106,79 @@ CREATE TABLE IF NOT EXISTS week_approvals (
 CREATE INDEX IF NOT EXISTS idx_week_approvals_mentee_id ON week_approvals(mentee_id);
 CREATE INDEX IF NOT EXISTS idx_week_approvals_mentor_id ON week_approvals(mentor_id);
 CREATE INDEX IF NOT EXISTS idx_week_approvals_status ON week_approvals(status);
+CREATE INDEX IF NOT EXISTS idx_week_approvals_mentor_status ON week_approvals(mentor_id, status);
+CREATE INDEX IF NOT EXISTS idx_week_approvals_mentee_timeline ON week_approvals(mentee_id, submitted_at DESC, id DESC);
+
+-- When an approval was approved or rejected (approved_at only covers approvals)
+ALTER TABLE week_approvals ADD COLUMN IF NOT EXISTS reviewed_at TIMESTAMPTZ;
+
+CREATE OR REPLACE FUNCTION set_week_approval_reviewed_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.status IS DISTINCT FROM OLD.status AND NEW.status IN ('approved', 'rejected') THEN
+        NEW.reviewed_at := NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS week_approvals_reviewed_at ON week_approvals;
+CREATE TRIGGER week_approvals_reviewed_at
+    BEFORE UPDATE OF status ON week_approvals
+    FOR EACH ROW EXECUTE FUNCTION set_week_approval_reviewed_at();
+
+UPDATE week_approvals SET reviewed_at = approved_at WHERE reviewed_at IS NULL AND approved_at IS NOT NULL;
+
+-- Per-mentor histogram of submission-to-decision time, updated as approvals are decided.
+-- Bucket i holds latencies in [1.1^i, 1.1^(i+1)) seconds (see app/analytics/latency.py).
+CREATE TABLE IF NOT EXISTS mentor_latency_histograms (
+    mentor_id TEXT NOT NULL REFERENCES users(id),
+    bucket INTEGER NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (mentor_id, bucket)
+);
+
+CREATE OR REPLACE FUNCTION latency_bucket(seconds DOUBLE PRECISION)
+RETURNS INTEGER
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT GREATEST(0, floor(ln(GREATEST(seconds, 1)) / ln(1.1)))::INTEGER;
+$$;
+
+CREATE OR REPLACE FUNCTION record_approval_latency()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Rows without a submission time have no latency; skip them rather than fail the decision
+    IF OLD.status = 'pending' AND NEW.status IN ('approved', 'rejected')
+       AND NEW.submitted_at IS NOT NULL AND NEW.reviewed_at IS NOT NULL THEN
+        INSERT INTO mentor_latency_histograms (mentor_id, bucket, count)
+        VALUES (NEW.mentor_id, latency_bucket(EXTRACT(EPOCH FROM NEW.reviewed_at - NEW.submitted_at)), 1)
+        ON CONFLICT (mentor_id, bucket) DO UPDATE SET count = mentor_latency_histograms.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS week_approvals_latency ON week_approvals;
+CREATE TRIGGER week_approvals_latency
+    AFTER UPDATE OF status ON week_approvals
+    FOR EACH ROW EXECUTE FUNCTION record_approval_latency();
+
+-- One-off backfill from decisions made before the histogram existed
+INSERT INTO mentor_latency_histograms (mentor_id, bucket, count)
+SELECT mentor_id, latency_bucket(EXTRACT(EPOCH FROM reviewed_at - submitted_at)), COUNT(*)
+FROM week_approvals
+WHERE status IN ('approved', 'rejected') AND reviewed_at IS NOT NULL AND submitted_at IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM mentor_latency_histograms)
+GROUP BY 1, 2;
+
+-- Range scans for incremental rollups
+CREATE INDEX IF NOT EXISTS idx_week_approvals_submitted_at ON week_approvals(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_week_approvals_reviewed_at ON week_approvals(reviewed_at);
 
 -- Messages table
 CREATE TABLE IF NOT EXISTS messages (
@@ -86,6 +199,17 @@ CREATE TABLE IF NOT EXISTS messages (
 CREATE INDEX IF NOT EXISTS idx_messages_from_id ON messages(from_id);
 CREATE INDEX IF NOT EXISTS idx_messages_to_id ON messages(to_id);
 CREATE INDEX IF NOT EXISTS idx_messages_parent_message_id ON messages(parent_message_id);
+CREATE INDEX IF NOT EXISTS idx_messages_to_status ON messages(to_id, status);
+CREATE INDEX IF NOT EXISTS idx_messages_to_created_at ON messages(to_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_messages_from_created_at ON messages(from_id, created_at DESC);
+
+-- Full-text search over subject, content and response
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(subject, '') || ' ' || coalesce(content, '') || ' ' || coalesce(response, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_messages_search_vector ON messages USING GIN (search_vector);
 
 -- Admin Reviews table
 CREATE TABLE IF NOT EXISTS admin_reviews (
@@ -99,6 +223,7 @@ CREATE TABLE IF NOT EXISTS admin_reviews (
 
 CREATE INDEX IF NOT EXISTS idx_admin_reviews_mentee_id ON admin_reviews(mentee_id);
 CREATE INDEX IF NOT EXISTS idx_admin_reviews_reviewer_id ON admin_reviews(reviewer_id);
+CREATE INDEX IF NOT EXISTS idx_admin_reviews_mentee_timeline ON admin_reviews(mentee_id, created_at DESC, id DESC);
 
 -- Mentor Feedbacks table
 CREATE TABLE IF NOT EXISTS mentor_feedbacks (
@@ -112,6 +237,262 @@ CREATE TABLE IF NOT EXISTS mentor_feedbacks (
 
 CREATE INDEX IF NOT EXISTS idx_mentor_feedbacks_mentee_id ON mentor_feedbacks(mentee_id);
 CREATE INDEX IF NOT EXISTS idx_mentor_feedbacks_mentor_id ON mentor_feedbacks(mentor_id);
+CREATE INDEX IF NOT EXISTS idx_mentor_feedbacks_mentee_timeline ON mentor_feedbacks(mentee_id, created_at DESC, id DESC);
+
+-- Analytics rollups, maintained by refresh_analytics_rollups() on a schedule
+CREATE TABLE IF NOT EXISTS approval_rollups (
+    period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+    period_start DATE NOT NULL,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    approved INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    active_mentees INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS mentor_latency_rollups (
+    period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+    period_start DATE NOT NULL,
+    mentor_id TEXT NOT NULL REFERENCES users(id),
+    decisions INTEGER NOT NULL,
+    median_latency_seconds DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (period, period_start, mentor_id)
+);
+
+-- Older schemas counted approvals only; rename and rebuild the rollups with approved + rejected
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'mentor_latency_rollups' AND column_name = 'approvals'
+    ) THEN
+        ALTER TABLE mentor_latency_rollups RENAME COLUMN approvals TO decisions;
+        DELETE FROM mentor_latency_rollups;
+        DELETE FROM rollup_state WHERE name = 'analytics';
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_mentor_latency_rollups_mentor ON mentor_latency_rollups(mentor_id, period, period_start);
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    high_water_mark TIMESTAMPTZ NOT NULL
+);
+
+-- Functions (called through PostgREST RPC)
+
+-- Full reply tree containing a message: walk up to the root, then down all replies
+CREATE OR REPLACE FUNCTION get_message_thread(target_id TEXT)
+RETURNS SETOF messages
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE ancestors AS (
+        SELECT m.id, m.parent_message_id FROM messages m WHERE m.id = target_id
+        UNION ALL
+        SELECT m.id, m.parent_message_id FROM messages m JOIN ancestors a ON m.id = a.parent_message_id
+    ),
+    thread AS (
+        SELECT m.* FROM messages m JOIN ancestors a ON m.id = a.id WHERE a.parent_message_id IS NULL
+        UNION ALL
+        SELECT m.* FROM messages m JOIN thread t ON m.parent_message_id = t.id
+    )
+    SELECT * FROM thread ORDER BY created_at, id;
+$$;
+
+-- Inbox: latest message per counterpart plus how many of their messages await a response
+CREATE OR REPLACE FUNCTION get_conversations(target_user_id TEXT)
+RETURNS TABLE (counterpart_id TEXT, counterpart_name TEXT, awaiting_count BIGINT, last_message JSONB)
+LANGUAGE sql STABLE
+AS $$
+    WITH mine AS (
+        SELECT m.*, m.to_id AS counterpart FROM messages m WHERE m.from_id = target_user_id
+        UNION ALL
+        SELECT m.*, m.from_id AS counterpart FROM messages m
+        WHERE m.to_id = target_user_id AND m.from_id <> target_user_id
+    ),
+    latest AS (
+        SELECT DISTINCT ON (counterpart) *
+        FROM mine
+        ORDER BY counterpart, created_at DESC, id DESC
+    ),
+    awaiting AS (
+        SELECT m.from_id AS counterpart, COUNT(*) AS n
+        FROM messages m
+        WHERE m.to_id = target_user_id AND m.status = 'awaiting_response'
+        GROUP BY m.from_id
+    )
+    SELECT l.counterpart, u.name, COALESCE(a.n, 0), to_jsonb(l) - 'counterpart' - 'search_vector'
+    FROM latest l
+    LEFT JOIN users u ON u.id = l.counterpart
+    LEFT JOIN awaiting a ON a.counterpart = l.counterpart
+    ORDER BY l.created_at DESC;
+$$;
+
+-- Ranked full-text search over a user's messages with keyset pagination on (rank, id)
+CREATE OR REPLACE FUNCTION search_messages(
+    target_user_id TEXT,
+    search_query TEXT,
+    page_size INTEGER DEFAULT 20,
+    after_rank REAL DEFAULT NULL,
+    after_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (rank REAL, message JSONB)
+LANGUAGE sql STABLE
+AS $$
+    WITH hits AS (
+        SELECT m.*, ts_rank(m.search_vector, q.query, 1) AS rank
+        FROM messages m, plainto_tsquery('english', search_query) AS q(query)
+        WHERE m.search_vector @@ q.query
+          AND (m.from_id = target_user_id OR m.to_id = target_user_id)
+    )
+    SELECT h.rank, to_jsonb(h) - 'rank' - 'search_vector'
+    FROM hits h
+    WHERE after_rank IS NULL OR (h.rank, h.id) < (after_rank, after_id)
+    ORDER BY h.rank DESC, h.id DESC
+    LIMIT page_size;
+$$;
+
+-- Directory search: exact member number matches first, then trigram name/email matches
+CREATE OR REPLACE FUNCTION search_users(
+    search_query TEXT,
+    search_role TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 10
+)
+RETURNS TABLE (id TEXT, name TEXT, number TEXT, role TEXT)
+LANGUAGE sql STABLE
+AS $$
+    WITH q AS (
+        SELECT upper(search_query) AS number,
+               '%' || replace(replace(replace(search_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    )
+    SELECT u.id, u.name, COALESCE(u.mentee_number, u.membership_number), u.role
+    FROM users u, q
+    WHERE (search_role IS NULL OR u.role = search_role)
+      AND (
+          u.mentee_number = q.number
+          OR u.membership_number = q.number
+          OR u.name ILIKE q.pattern
+          OR u.email ILIKE q.pattern
+      )
+    ORDER BY (u.mentee_number = q.number OR u.membership_number = q.number) IS TRUE DESC,
+             similarity(u.name, search_query) DESC,
+             u.name
+    LIMIT result_limit;
+$$;
+
+-- Mentor dashboard: mentee and approval counts in one round trip
+CREATE OR REPLACE FUNCTION get_mentor_stats(target_mentor_id TEXT)
+RETURNS TABLE (
+    assigned_mentees BIGINT,
+    pending_approvals BIGINT,
+    completed_approvals BIGINT,
+    total_completed_weeks BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH mentees AS (
+        SELECT COUNT(*) AS n,
+               COALESCE(SUM(bit_count(completed_weeks_mask::BIT(64))), 0) AS weeks
+        FROM users
+        WHERE role = 'mentee' AND mentor_id = target_mentor_id
+    ),
+    approvals AS (
+        SELECT COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+               COUNT(*) FILTER (WHERE status = 'approved') AS approved
+        FROM week_approvals
+        WHERE mentor_id = target_mentor_id
+    )
+    SELECT m.n, a.pending, a.approved, m.weeks::BIGINT
+    FROM mentees m, approvals a;
+$$;
+
+-- Admin dashboard: mentees who completed each week, without shipping user rows to the API
+CREATE OR REPLACE FUNCTION get_week_completions()
+RETURNS TABLE (week INTEGER, completions BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT w.week, COUNT(*)
+    FROM users u, generate_series(1, 36) AS w(week)
+    WHERE u.role = 'mentee' AND u.completed_weeks_mask & (1::BIGINT << (w.week - 1)) <> 0
+    GROUP BY w.week
+    ORDER BY w.week;
+$$;
+
+-- Incremental rollup refresh: recomputes only the days and weeks that can have changed since
+-- the last run's high-water mark. The mark trails now() so rows committed late are not missed.
+-- Each call advances the mark by at most max_span, so the first run (or catching up after a
+-- long pause) is spread over several scheduler ticks instead of one statement over all history.
+-- Replaces the earlier zero-argument version, which would make calls without arguments ambiguous
+DROP FUNCTION IF EXISTS refresh_analytics_rollups();
+CREATE OR REPLACE FUNCTION refresh_analytics_rollups(max_span INTERVAL DEFAULT INTERVAL '30 days')
+RETURNS TIMESTAMPTZ
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    previous_mark TIMESTAMPTZ;
+    new_mark TIMESTAMPTZ;
+    since TIMESTAMPTZ;
+BEGIN
+    -- Another instance is already refreshing
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_analytics_rollups')) THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT high_water_mark INTO previous_mark FROM rollup_state WHERE name = 'analytics';
+    IF previous_mark IS NULL THEN
+        -- First run: start at the earliest event rather than scanning from -infinity
+        SELECT LEAST(MIN(submitted_at), MIN(reviewed_at)) INTO previous_mark FROM week_approvals;
+        previous_mark := COALESCE(previous_mark, NOW());
+    END IF;
+    new_mark := LEAST(NOW() - INTERVAL '5 minutes', previous_mark + max_span);
+    IF new_mark <= previous_mark THEN
+        RETURN previous_mark;
+    END IF;
+    since := date_trunc('week', previous_mark);
+
+    -- Events up to new_mark only; a period cut short here is recomputed whole by the next call
+    WITH periods(period) AS (VALUES ('day'), ('week')),
+    events AS (
+        SELECT mentee_id, 'submitted' AS kind, submitted_at AS at FROM week_approvals
+        WHERE submitted_at >= since AND submitted_at < new_mark
+        UNION ALL
+        SELECT mentee_id, status, reviewed_at FROM week_approvals
+        WHERE status IN ('approved', 'rejected') AND reviewed_at >= since AND reviewed_at < new_mark
+    )
+    INSERT INTO approval_rollups (period, period_start, submitted, approved, rejected, active_mentees)
+    SELECT p.period, date_trunc(p.period, e.at)::DATE,
+           COUNT(*) FILTER (WHERE e.kind = 'submitted'),
+           COUNT(*) FILTER (WHERE e.kind = 'approved'),
+           COUNT(*) FILTER (WHERE e.kind = 'rejected'),
+           COUNT(DISTINCT e.mentee_id)
+    FROM events e CROSS JOIN periods p
+    WHERE e.at >= date_trunc(p.period, previous_mark)
+    GROUP BY 1, 2
+    ON CONFLICT (period, period_start) DO UPDATE SET
+        submitted = EXCLUDED.submitted,
+        approved = EXCLUDED.approved,
+        rejected = EXCLUDED.rejected,
+        active_mentees = EXCLUDED.active_mentees;
+
+    -- Same decisions as mentor_latency_histograms: approved or rejected, with both timestamps
+    WITH periods(period) AS (VALUES ('day'), ('week'))
+    INSERT INTO mentor_latency_rollups (period, period_start, mentor_id, decisions, median_latency_seconds)
+    SELECT p.period, date_trunc(p.period, a.reviewed_at)::DATE, a.mentor_id, COUNT(*),
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM a.reviewed_at - a.submitted_at))
+    FROM week_approvals a CROSS JOIN periods p
+    WHERE a.status IN ('approved', 'rejected') AND a.submitted_at IS NOT NULL
+      AND a.reviewed_at >= date_trunc(p.period, previous_mark) AND a.reviewed_at < new_mark
+    GROUP BY 1, 2, 3
+    ON CONFLICT (period, period_start, mentor_id) DO UPDATE SET
+        decisions = EXCLUDED.decisions,
+        median_latency_seconds = EXCLUDED.median_latency_seconds;
+
+    INSERT INTO rollup_state (name, high_water_mark) VALUES ('analytics', new_mark)
+    ON CONFLICT (name) DO UPDATE SET high_water_mark = EXCLUDED.high_water_mark;
+    RETURN new_mark;
+END;
+$$;
 
 -- Enable Row Level Security (optional, for additional security)
 -- ALTER TABLE users ENABLE ROW LEVEL SECURITY;
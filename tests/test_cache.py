@@ -0,0 +1,33 @@
+import time
+from app.cache import TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    """Test that entries are dropped after their time-to-live"""
+    cache = TTLCache(ttl=0.01)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the cache stays within maxsize"""
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_invalidate():
+    """Test explicit invalidation"""
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a", "default") == "default"
@@ -0,0 +1,57 @@
+import asyncio
+import httpx
+from app.concurrency import AIMDLimiter, ConcurrencyLimitMiddleware, route_class
+
+
+def test_route_classes():
+    """Test that aggregates and lists are separated from cheap routes and probes are exempt"""
+    assert route_class("/analytics/dashboard") == "expensive"
+    assert route_class("/users/") == "expensive"
+    assert route_class("/auth/me") == "default"
+    assert route_class("/users/abc") == "default"
+    assert route_class("/users/abc/timeline") == "expensive"
+    assert route_class("/health/ready") is None
+
+
+def test_aimd_adjusts_limit():
+    """Test additive increase on fast responses and multiplicative decrease on slow ones"""
+    limiter = AIMDLimiter("test", initial=4, max_limit=8, target_ms=100)
+    for _ in range(4):
+        assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.rejected == 1
+
+    for _ in range(4):
+        limiter.release(latency_ms=10)
+    increased = limiter.limit
+    assert 4.9 < increased < 5
+
+    limiter.try_acquire()
+    limiter.release(latency_ms=500)
+    assert limiter.limit == increased * 0.9
+    limiter.try_acquire()
+    limiter.release(latency_ms=10, failed=True)
+    # Only one decrease per target interval
+    assert limiter.limit == increased * 0.9
+
+
+async def test_middleware_sheds_excess_requests():
+    """Test that requests over the limit get an immediate 503 with Retry-After"""
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limiter = AIMDLimiter("test", initial=1, max_limit=1, target_ms=1000)
+    middleware = ConcurrencyLimitMiddleware(app, {"expensive": limiter})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/analytics/dashboard"))
+        await asyncio.sleep(0.01)
+        rejected = await client.get("/analytics/dashboard")
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "1"
+        release.set()
+        assert (await first).status_code == 200
+    assert limiter.in_flight == 0
@@ -0,0 +1,37 @@
+import asyncio
+import time
+from app.health.probes import DatabaseProbe, LoopLagMonitor
+
+
+async def test_database_probe_is_cached_and_shared(monkeypatch):
+    """Test that concurrent and repeated checks within the TTL run one query"""
+    calls = []
+    monkeypatch.setattr(DatabaseProbe, "_query", staticmethod(lambda: calls.append(1)))
+    probe = DatabaseProbe(ttl=60)
+    results = await asyncio.gather(*(probe.check() for _ in range(5)))
+    assert len(calls) == 1
+    assert all(result["ok"] for result in results)
+
+
+async def test_database_probe_reports_failures_and_timeouts(monkeypatch):
+    """Test that errors and slow queries mark the database as not ok"""
+    def fail():
+        raise ConnectionError("down")
+    monkeypatch.setattr(DatabaseProbe, "_query", staticmethod(fail))
+    result = await DatabaseProbe(ttl=0).check()
+    assert result == {"ok": False, "latency_ms": result["latency_ms"], "error": "ConnectionError"}
+
+    monkeypatch.setattr(DatabaseProbe, "_query", staticmethod(lambda: time.sleep(0.2)))
+    result = await DatabaseProbe(ttl=0, timeout=0.05).check()
+    assert result["error"] == "TimeoutError"
+
+
+async def test_loop_lag_monitor_detects_blocking():
+    """Test that blocking the loop shows up as lag"""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    monitor.stop()
+    assert monitor.lag_ms >= 50
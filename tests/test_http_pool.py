@@ -0,0 +1,66 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import httpx
+import pytest
+from app.http_pool import InstrumentedTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport_reuses_keepalive_connections(server_url):
+    """Test that sequential requests share one pooled connection and are counted"""
+    transport = InstrumentedTransport(limits=httpx.Limits(max_connections=4))
+    with httpx.Client(transport=transport) as client:
+        for _ in range(3):
+            assert client.get(server_url).json() == []
+        stats = transport.stats()
+    assert stats["requests_total"] == 3
+    assert stats["requests_in_flight"] == 0
+    assert stats["created"] == 1
+    assert stats["open"] == 1 and stats["idle"] == 1 and stats["in_use"] == 0
+    assert stats["saturation"] == 0.0
+
+
+def test_transport_tracks_in_flight_streams(server_url):
+    """Test that a response counts as in flight until its stream is closed"""
+    transport = InstrumentedTransport(limits=httpx.Limits(max_connections=4))
+    with httpx.Client(transport=transport) as client:
+        with client.stream("GET", server_url):
+            stats = transport.stats()
+            assert stats["requests_in_flight"] == 1
+            assert stats["in_use"] == 1 and stats["saturation"] == 0.25
+        assert transport.stats()["requests_in_flight"] == 0
+
+
+
+def test_stats_survive_missing_pool_internals(server_url):
+    """Test that request counts still work if httpx stops exposing the pool's connections"""
+    transport = InstrumentedTransport(limits=httpx.Limits(max_connections=4))
+    with httpx.Client(transport=transport) as client:
+        with client.stream("GET", server_url):
+            pool, transport._pool = transport._pool, object()
+            stats = transport.stats()
+            transport._pool = pool
+    assert stats["requests_in_flight"] == 1 and stats["in_use"] == 1 and stats["waiting"] == 0
+    assert stats["open"] is None and stats["idle"] is None and stats["created"] is None
@@ -0,0 +1,26 @@
+import random
+from app.analytics.latency import bucket_for, merge_rows, quantiles
+
+
+def test_quantiles_within_bucket_error():
+    """Test that histogram quantiles stay within ~5% of the exact values"""
+    random.seed(7)
+    latencies = sorted(random.lognormvariate(10, 1.2) for _ in range(5000))
+    buckets = {}
+    for latency in latencies:
+        buckets[bucket_for(latency)] = buckets.get(bucket_for(latency), 0) + 1
+    for q, estimate in quantiles(buckets).items():
+        exact = latencies[max(0, int(q * len(latencies)) - 1)]
+        assert abs(estimate - exact) / exact < 0.06
+
+
+def test_empty_histogram_and_row_merging():
+    """Test that no decisions report zeros and rows group per mentor"""
+    assert quantiles({}) == {0.5: 0.0, 0.9: 0.0, 0.99: 0.0}
+    rows = [
+        {"mentor_id": "m1", "bucket": 3, "count": 2},
+        {"mentor_id": "m2", "bucket": 5, "count": 1},
+        {"mentor_id": "m1", "bucket": 4, "count": 1},
+    ]
+    assert merge_rows(rows) == {"m1": {3: 2, 4: 1}, "m2": {5: 1}}
+    assert bucket_for(0) == 0
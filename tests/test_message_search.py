@@ -0,0 +1,44 @@
+import pytest
+from app.messages.search import MessageSearchIndex, encode_cursor, decode_cursor
+
+
+def make_index():
+    index = MessageSearchIndex()
+    index.add({"id": "m1", "from_id": "a", "to_id": "b", "subject": "Week 3 drawing", "content": "Great drawing progress", "response": None})
+    index.add({"id": "m2", "from_id": "b", "to_id": "a", "subject": "Re: Week 3 drawing", "content": "Thanks", "response": None})
+    index.add({"id": "m3", "from_id": "a", "to_id": "c", "subject": "Week 4", "content": "Music practice with lots of other words here", "response": "drawing next"})
+    index.add({"id": "m4", "from_id": "c", "to_id": "d", "subject": "Week 3 drawing", "content": "drawing", "response": None})
+    return index
+
+
+def test_search_matches_all_terms_for_participant():
+    """Test AND semantics and that only the user's own messages are returned"""
+    index = make_index()
+    hits = index.search("a", "week drawing")
+    assert [message["id"] for _, message in hits] == ["m1", "m2", "m3"]
+    assert index.search("a", "music drawing")[0][1]["id"] == "m3"
+    assert index.search("a", "nonexistent") == []
+
+
+def test_search_keyset_pagination():
+    """Test that paging with the last hit as cursor walks all results once"""
+    index = make_index()
+    first = index.search("a", "drawing", limit=2)
+    rest = index.search("a", "drawing", limit=2, after=(first[-1][0], first[-1][1]["id"]))
+    ids = [message["id"] for _, message in first + rest]
+    assert sorted(ids) == ["m1", "m2", "m3"]
+
+
+def test_remove_drops_postings():
+    """Test removing a message from the index"""
+    index = make_index()
+    index.remove("m3")
+    assert index.search("a", "music") == []
+    assert len(index) == 3
+
+
+def test_cursor_round_trip():
+    """Test cursor encoding and rejection of garbage"""
+    assert decode_cursor(encode_cursor(0.0607927, "m1")) == (0.0607927, "m1")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
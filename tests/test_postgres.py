@@ -0,0 +1,30 @@
+import pytest
+from app.analytics.router import _dashboard_from_counts
+from app.postgres import PostgresBackend
+
+
+def test_dashboard_from_counts():
+    """Test that per-week completion counts roll up into blocs and totals"""
+    stats = _dashboard_from_counts({
+        "total_users": 7, "mentees": 4, "mentors": 2, "parents": 1,
+        "week_completions": {1: 4, 12: 2, 13: 3, 36: 1}
+    })
+    assert stats.completed_weeks == 10
+    assert [bloc["completed"] for bloc in stats.bloc_completion] == [6, 3, 1]
+    assert stats.weekly_progress[0] == {"week": 1, "completions": 4}
+    assert stats.weekly_progress[1] == {"week": 2, "completions": 0}
+    assert len(stats.weekly_progress) == 36
+    assert stats.mentor_mentee_ratio == 2.0
+    assert stats.average_progress == 7
+
+
+async def test_backend_is_opt_in(monkeypatch):
+    """Test that the default backend opens no pool and asyncpg requires DATABASE_URL"""
+    backend = PostgresBackend("postgrest")
+    await backend.connect()
+    assert not backend.enabled
+    assert backend.stats()["size"] == 0
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with pytest.raises(ValueError):
+        await PostgresBackend("asyncpg").connect()
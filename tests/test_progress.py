@@ -0,0 +1,40 @@
+import pytest
+from app.curriculum.progress import (
+    ALL_WEEKS_MASK, add_week, bloc_completed_count, bloc_mask, completed_count,
+    decode_mask, encode_mask, has_week, mask_to_weeks, weeks_to_mask,
+)
+
+
+def test_mask_round_trip():
+    """Test that lists and masks convert both ways, ignoring out-of-range weeks"""
+    mask = weeks_to_mask([3, 1, 36, 1, 0, 40])
+    assert mask == 0b101 | 1 << 35
+    assert mask_to_weeks(mask) == [1, 3, 36]
+    assert weeks_to_mask(range(1, 37)) == ALL_WEEKS_MASK
+
+
+def test_membership_and_popcount():
+    """Test membership, adding weeks and counting them"""
+    mask = add_week(weeks_to_mask([2]), 12)
+    assert has_week(mask, 12) and has_week(mask, 2) and not has_week(mask, 13)
+    assert add_week(mask, 12) == mask
+    assert completed_count(mask) == 2
+    with pytest.raises(ValueError):
+        has_week(mask, 37)
+
+
+def test_bloc_masks():
+    """Test that bloc masks partition the 36 weeks into three blocs of 12"""
+    assert bloc_mask(1) | bloc_mask(2) | bloc_mask(3) == ALL_WEEKS_MASK
+    assert bloc_mask(1) & bloc_mask(2) == 0
+    mask = weeks_to_mask([1, 12, 13, 25, 36])
+    assert [bloc_completed_count(mask, bloc) for bloc in (1, 2, 3)] == [2, 1, 2]
+
+
+def test_packed_encoding():
+    """Test that a mask packs into 8 base64 characters and back"""
+    mask = weeks_to_mask([1, 2, 36])
+    encoded = encode_mask(mask)
+    assert len(encoded) == 8
+    assert decode_mask(encoded) == mask
+    assert decode_mask(encode_mask(0)) == 0
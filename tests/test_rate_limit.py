@@ -0,0 +1,48 @@
+import pytest
+from fastapi import HTTPException
+from app.auth.rate_limit import TokenBucket, EndpointRateLimit, parse_limit
+
+
+class FakeClient:
+    host = "10.0.0.1"
+
+
+class FakeRequest:
+    client = FakeClient()
+
+
+def test_parse_limit():
+    """Test parsing of <requests>/<seconds> limits"""
+    assert parse_limit("5/60") == (5, 60.0)
+    with pytest.raises(ValueError):
+        parse_limit("0/60")
+    with pytest.raises(ValueError):
+        parse_limit("five")
+
+
+def test_token_bucket_allows_burst_then_blocks():
+    """Test that a bucket allows capacity requests then reports a retry delay"""
+    bucket = TokenBucket(capacity=3, period=60)
+    assert [bucket.consume("ip") for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = bucket.consume("ip")
+    assert 0 < retry_after <= 20
+    assert bucket.consume("other-ip") == 0.0
+
+
+def test_token_bucket_evicts_least_recently_used_keys():
+    """Test that the number of tracked keys stays bounded"""
+    bucket = TokenBucket(capacity=1, period=60, max_keys=2)
+    for key in ("a", "b", "c", "d"):
+        bucket.consume(key)
+    assert len(bucket) <= 2
+
+
+def test_endpoint_rate_limit_raises_429_per_email():
+    """Test that the email limit applies across IPs and returns Retry-After"""
+    limit = EndpointRateLimit("test", ip_limit="100/60", email_limit="2/60")
+    limit.check(FakeRequest(), "User@example.com")
+    limit.check(FakeRequest(), "user@example.com")
+    with pytest.raises(HTTPException) as exc_info:
+        limit.check(FakeRequest(), "user@example.com")
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
@@ -0,0 +1,97 @@
+import asyncio
+from fastapi import WebSocketDisconnect
+
+from app.messages.realtime import Connection, ConnectionHub, token_from_subprotocols
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.disconnected = asyncio.Event()
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.close_code = code
+        self.disconnected.set()
+
+    async def receive_text(self):
+        await self.disconnected.wait()
+        raise WebSocketDisconnect()
+
+
+class BrokenWebSocket(FakeWebSocket):
+    async def send_json(self, data):
+        raise ConnectionResetError("peer gone")
+
+
+async def test_publish_delivers_to_all_user_connections():
+    """Test that every connection of the recipient gets the event"""
+    hub = ConnectionHub()
+    first = Connection(FakeWebSocket(), "user-1")
+    second = Connection(FakeWebSocket(), "user-1")
+    other = Connection(FakeWebSocket(), "user-2")
+    for connection in (first, second, other):
+        hub.register(connection)
+
+    delivered = hub.publish("user-1", {"event": "message"})
+    assert delivered == 2
+    assert first.queue.qsize() == 1
+    assert other.queue.qsize() == 0
+
+
+async def test_slow_consumer_is_dropped():
+    """Test that a connection with a full queue is closed and unregistered"""
+    hub = ConnectionHub()
+    websocket = FakeWebSocket()
+    connection = Connection(websocket, "user-1", queue_size=2)
+    hub.register(connection)
+
+    assert hub.publish("user-1", {"n": 1}) == 1
+    assert hub.publish("user-1", {"n": 2}) == 1
+    assert hub.publish("user-1", {"n": 3}) == 0
+    await asyncio.sleep(0)
+
+    assert not hub.is_connected("user-1")
+    assert websocket.close_code == 1013
+
+
+async def test_sender_drains_queue_in_order():
+    """Test that queued events are sent in order and the sender stops on close"""
+    websocket = FakeWebSocket()
+    connection = Connection(websocket, "user-1")
+    connection.offer({"n": 1})
+    connection.offer({"n": 2})
+    sender = asyncio.ensure_future(connection.sender())
+    await asyncio.sleep(0)
+    await connection.close()
+    await sender
+
+    assert websocket.sent == [{"n": 1}, {"n": 2}]
+
+
+async def test_sender_failure_unregisters_and_closes(caplog):
+    """Test that a failed send is logged and the connection leaves the hub"""
+    hub = ConnectionHub()
+    websocket = BrokenWebSocket()
+    connection = Connection(websocket, "user-1")
+    serving = asyncio.ensure_future(hub.serve(connection))
+    await asyncio.sleep(0)
+    assert hub.is_connected("user-1")
+
+    hub.publish("user-1", {"n": 1})
+    await asyncio.wait_for(serving, timeout=1)
+
+    assert not hub.is_connected("user-1")
+    assert websocket.close_code == 1011
+    assert "peer gone" in caplog.text
+
+
+def test_token_from_subprotocols():
+    """Test extracting the access token offered after the bearer subprotocol"""
+    assert token_from_subprotocols(["bearer", "jwt"]) == "jwt"
+    assert token_from_subprotocols(["chat", "bearer", "jwt"]) == "jwt"
+    assert token_from_subprotocols(["bearer"]) is None
+    assert token_from_subprotocols([]) is None
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi.concurrency import run_in_threadpool
+from app import resilience
+from app.resilience import (
+    CircuitBreaker, CircuitOpen, DatabaseUnavailable, DeadlineExceeded, ResilientTransport,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0)
+
+
+def _client(statuses, breaker=None, attempts=3):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1], json=[])
+
+    transport = ResilientTransport(httpx.MockTransport(handler), breaker or CircuitBreaker("db", 5, 60), attempts)
+    return httpx.Client(transport=transport, base_url="http://db"), calls
+
+
+def test_retries_idempotent_reads_only():
+    """Test that GETs are retried on gateway errors while writes are not"""
+    client, calls = _client([503, 503, 200])
+    assert client.get("/users").status_code == 200
+    assert len(calls) == 3
+
+    client, calls = _client([503, 200])
+    assert client.post("/users").status_code == 503
+    assert len(calls) == 1
+
+
+def test_exhausted_retries_raise():
+    """Test that a read failing every attempt raises instead of returning the error"""
+    client, calls = _client([503])
+    with pytest.raises(DatabaseUnavailable):
+        client.get("/users")
+    assert len(calls) == 3
+
+
+def test_reads_on_the_event_loop_are_not_retried():
+    """Test that a read issued from a coroutine gets one attempt, so backoff never blocks the loop"""
+    client, calls = _client([503, 200])
+
+    async def read():
+        return client.get("/users")
+
+    with pytest.raises(DatabaseUnavailable):
+        asyncio.run(read())
+    assert len(calls) == 1
+
+
+def test_reads_from_handlers_through_the_threadpool_are_retried():
+    """Test that a read issued from a coroutine via run_in_threadpool gets the full retry budget"""
+    client, calls = _client([503, 503, 200])
+
+    async def read():
+        return await run_in_threadpool(client.get, "/users")
+
+    assert asyncio.run(read()).status_code == 200
+    assert len(calls) == 3
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    """Test the closed -> open -> half_open -> closed cycle"""
+    breaker = CircuitBreaker("db", failure_threshold=2, reset_timeout=0.05)
+    client, calls = _client([503, 503, 200], breaker=breaker, attempts=1)
+    for _ in range(2):
+        with pytest.raises(DatabaseUnavailable):
+            client.get("/users")
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpen):
+        client.get("/users")
+    assert len(calls) == 2
+
+    time.sleep(0.06)
+    assert client.get("/users").status_code == 200
+    assert breaker.state == "closed"
+    assert breaker.stats()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_spent_budget_fails_before_calling():
+    """Test that no call is made once the request's deadline has passed"""
+    client, calls = _client([200])
+    token = resilience._deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            client.get("/users")
+    finally:
+        resilience._deadline.reset(token)
+    assert calls == []
+
+
+def test_unexpected_error_in_half_open_trial_reopens_circuit():
+    """Test that a trial call failing with a non-transport error does not wedge the breaker"""
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=0.05)
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) == 2:
+            raise RuntimeError("unexpected")
+        return httpx.Response(503 if len(calls) == 1 else 200, json=[])
+
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(handler), breaker, 1), base_url="http://db")
+    with pytest.raises(DatabaseUnavailable):
+        client.get("/users")
+    time.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        client.get("/users")
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert client.get("/users").status_code == 200
+    assert breaker.state == "closed"
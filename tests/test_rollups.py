@@ -0,0 +1,25 @@
+from app.analytics.rollups import RollupScheduler
+
+
+async def test_run_once_records_high_water_mark(monkeypatch):
+    """Test that a refresh stores the returned mark and a locked refresh keeps the old one"""
+    marks = iter(["2026-01-05T10:00:00+00:00", None])
+    monkeypatch.setattr(RollupScheduler, "_refresh_through_rpc", staticmethod(lambda: next(marks)))
+    scheduler = RollupScheduler(interval=60)
+    await scheduler.run_once()
+    await scheduler.run_once()
+    stats = scheduler.stats()
+    assert stats["runs"] == 2 and stats["failures"] == 0
+    assert stats["high_water_mark"] == "2026-01-05T10:00:00+00:00"
+
+
+async def test_failed_refresh_is_counted(monkeypatch):
+    """Test that a failing refresh is recorded and does not raise"""
+    def fail():
+        raise ConnectionError("down")
+    monkeypatch.setattr(RollupScheduler, "_refresh_through_rpc", staticmethod(fail))
+    scheduler = RollupScheduler(interval=60)
+    await scheduler.run_once()
+    assert scheduler.stats()["failures"] == 1
+    assert scheduler.stats()["high_water_mark"] is None
+    assert scheduler.stats()["last_duration_ms"] is not None
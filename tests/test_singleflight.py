@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from app.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    """Test that identical concurrent reads collapse into one call"""
+    flight = SingleFlight()
+    executions = []
+
+    async def load():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return ["week 1"]
+
+    results = await asyncio.gather(*(flight.do("weeks", load) for _ in range(10)))
+    assert len(executions) == 1
+    assert all(result == ["week 1"] for result in results)
+    assert flight.stats()["weeks"] == {"calls": 10, "executions": 1, "collapsed": 9, "in_flight": 0}
+
+    # Once finished, the next call runs again
+    await flight.do("weeks", load)
+    assert len(executions) == 2
+
+
+async def test_errors_are_shared_and_not_kept():
+    """Test that every waiter sees the failure and a later call retries"""
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    results = await asyncio.gather(*(flight.do("dashboard", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+    with pytest.raises(ConnectionError):
+        await flight.do("dashboard", fail)
+    assert flight.stats()["dashboard"]["executions"] == 2
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    """Test that the call survives the first caller going away"""
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return 42
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == 42
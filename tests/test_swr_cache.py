@@ -0,0 +1,76 @@
+import asyncio
+from app.cache import StaleWhileRevalidateCache
+
+
+def _loader(values):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return values[len(calls) - 1]
+
+    return load, calls
+
+
+async def test_serves_stale_value_while_refreshing():
+    """Test that a value past the soft TTL is returned at once and refreshed in the background"""
+    cache = StaleWhileRevalidateCache(soft_ttl=0.05, hard_ttl=10)
+    load, calls = _loader(["v1", "v2"])
+    assert await cache.get("dashboard", load) == "v1"
+    assert await cache.get("dashboard", load) == "v1"
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.06)
+    assert await cache.get("dashboard", load) == "v1"
+    await asyncio.sleep(0.02)
+    assert len(calls) == 2
+    assert await cache.get("dashboard", load) == "v2"
+    assert cache.stats()["stale"] == 1
+
+
+async def test_waits_for_fresh_value_past_hard_ttl():
+    """Test that expired values are never served"""
+    cache = StaleWhileRevalidateCache(soft_ttl=0.01, hard_ttl=0.02)
+    load, calls = _loader(["v1", "v2"])
+    await cache.get("key", load)
+    await asyncio.sleep(0.03)
+    assert await cache.get("key", load) == "v2"
+
+
+async def test_failed_background_refresh_keeps_stale_value():
+    """Test that a refresh error leaves the previous value in place"""
+    cache = StaleWhileRevalidateCache(soft_ttl=0, hard_ttl=10)
+
+    async def fail():
+        raise ConnectionError("down")
+
+    await cache.refresh("key", lambda: asyncio.sleep(0, result="v1"))
+    assert await cache.get("key", fail) == "v1"
+    await asyncio.sleep(0.01)
+    assert await cache.get("key", fail) == "v1"
+    assert cache.stats()["refresh_failed"] >= 1
+
+
+async def test_invalidation_discards_in_flight_load():
+    """Test that a load started before invalidation does not store its result"""
+    cache = StaleWhileRevalidateCache(soft_ttl=10, hard_ttl=10)
+    load, calls = _loader(["before", "after"])
+    pending = asyncio.create_task(cache.get("mentor", load))
+    await asyncio.sleep(0)
+    cache.invalidate("mentor")
+    assert await pending == "before"
+    assert await cache.get("mentor", load) == "after"
+
+
+async def test_callers_after_invalidation_do_not_join_older_load():
+    """Test that a load in flight across an invalidation is not shared with later callers"""
+    cache = StaleWhileRevalidateCache(soft_ttl=10, hard_ttl=10)
+    load, calls = _loader(["before", "after"])
+    pending = asyncio.create_task(cache.refresh("dashboard", load))
+    await asyncio.sleep(0)
+    cache.clear()
+    assert await cache.refresh("dashboard", load) == "after"
+    await pending
+    assert len(calls) == 2
+    assert await cache.get("dashboard", load) == "after"
@@ -0,0 +1,46 @@
+import pytest
+
+from app.users.timeline import decode_cursor, encode_cursor, keyset_filter, merge_pages
+
+T1 = "2026-01-01T10:00:00+00:00"
+T2 = "2026-01-02T10:00:00+00:00"
+T3 = "2026-01-03T10:00:00+00:00"
+
+
+def test_merge_orders_sources_newest_first_with_ties_by_kind_then_id():
+    """Test the k-way merge of per-source pages"""
+    pages = {
+        "approval": [{"id": "a2", "submitted_at": T3}, {"id": "a1", "submitted_at": T1}],
+        "feedback": [{"id": "f1", "created_at": T2}],
+        "message": [{"id": "m2", "created_at": T2}, {"id": "m1", "created_at": T2}],
+        "review": [],
+    }
+    events, cursor = merge_pages(pages, limit=10)
+    assert [row["id"] for _, row in events] == ["a2", "m2", "m1", "f1", "a1"]
+    assert cursor is None
+
+
+def test_merge_returns_cursor_of_last_event_when_more_remain():
+    """Test the next-page cursor"""
+    pages = {"approval": [{"id": "a1", "submitted_at": T1}], "feedback": [{"id": "f1", "created_at": T2}]}
+    events, cursor = merge_pages(pages, limit=1)
+    assert [kind for kind, _ in events] == ["feedback"]
+    assert cursor == (T2, "feedback", "f1")
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    """Test cursor encoding"""
+    cursor = (T2, "message", "m1")
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+    for encoded in ("not-a-cursor", encode_cursor(("yesterday", "message", "m1")), encode_cursor((T2, "unknown", "x"))):
+        with pytest.raises(ValueError):
+            decode_cursor(encoded)
+
+
+def test_keyset_filter_breaks_timestamp_ties_by_kind():
+    """Test the per-source keyset condition"""
+    cursor = (T2, "feedback", "f1")
+    assert keyset_filter("approval", None) is None
+    assert keyset_filter("approval", cursor) == f'submitted_at.lte."{T2}"'
+    assert keyset_filter("message", cursor) == f'created_at.lt."{T2}"'
+    assert keyset_filter("feedback", cursor) == f'or(created_at.lt."{T2}",and(created_at.eq."{T2}",id.lt."f1"))'
@@ -0,0 +1,71 @@
+import time
+from app.auth.utils import create_access_token, create_refresh_token, token_claims_for
+from app.auth.revocation import RevocationSet, revoked_tokens
+from app.dependencies import decode_token, get_user_from_token
+
+USER = {"id": "user-1", "role": "mentor", "name": "Test Mentor", "email": "mentor@example.com"}
+
+
+def test_access_token_resolves_user_from_claims():
+    """Test that an access token carries enough claims to skip the DB lookup"""
+    token = create_access_token(data=token_claims_for(USER))
+    assert get_user_from_token(token) == USER
+
+
+def test_refresh_token_is_not_an_access_token():
+    """Test that token types cannot be swapped"""
+    refresh_token = create_refresh_token(data={"sub": USER["id"]})
+    assert get_user_from_token(refresh_token) is None
+    assert decode_token(refresh_token, token_type="refresh")["sub"] == USER["id"]
+
+
+def test_revoked_token_is_rejected():
+    """Test that revoking a jti invalidates only that token"""
+    token = create_access_token(data=token_claims_for(USER))
+    other = create_access_token(data=token_claims_for(USER))
+    claims = decode_token(token)
+    revoked_tokens.revoke_token(claims["jti"], claims["exp"])
+    assert get_user_from_token(token) is None
+    assert get_user_from_token(other) is not None
+
+
+def test_revoke_user_rejects_earlier_tokens_only():
+    """Test that a user-wide revocation spares tokens issued afterwards"""
+    revocations = RevocationSet()
+    before = {"sub": "u", "jti": "a", "iat": time.time()}
+    revocations.revoke_user("u", max_token_lifetime=60)
+    after = {"sub": "u", "jti": "b", "iat": time.time() + 0.001}
+    assert revocations.is_revoked(before)
+    assert not revocations.is_revoked(after)
+    assert not revocations.is_revoked({"sub": "other", "jti": "c", "iat": before["iat"]})
+
+
+def test_expired_entries_are_purged():
+    """Test that entries are forgotten once the tokens they cover have expired"""
+    revocations = RevocationSet()
+    revocations.revoke_token("old", time.time() + 0.01)
+    revocations.revoke_token("new", time.time() + 60)
+    time.sleep(0.02)
+    assert not revocations.is_revoked({"jti": "old"})
+    assert revocations.is_revoked({"jti": "new"})
+    assert len(revocations) == 1
+
+
+def test_verified_token_cache_still_honours_revocation():
+    """Test that cached claims are reused but revocation is checked every time"""
+    from app.dependencies import verified_tokens
+    verified_tokens.clear()
+    token = create_access_token(data=token_claims_for(USER))
+    claims = decode_token(token)
+    assert len(verified_tokens) == 1
+    assert decode_token(token) is claims
+    revoked_tokens.revoke_token(claims["jti"], claims["exp"])
+    assert decode_token(token) is None
+
+
+def test_invalid_tokens_are_not_cached():
+    """Test that failed verifications leave the cache untouched"""
+    from app.dependencies import verified_tokens
+    verified_tokens.clear()
+    assert decode_token("not-a-jwt") is None
+    assert len(verified_tokens) == 0
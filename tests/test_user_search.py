@@ -0,0 +1,34 @@
+from app.users.search import UserPrefixIndex
+
+USERS = [
+    {"id": "1", "name": "Ada Lovelace", "email": "ada@example.com", "role": "mentee", "mentee_number": "MN001", "membership_number": None},
+    {"id": "2", "name": "Alan Turing", "email": "alan@example.com", "role": "mentor", "mentee_number": None, "membership_number": "MEM001"},
+    {"id": "3", "name": "Grace Hopper", "email": "grace@example.com", "role": "mentee", "mentee_number": "MN002", "membership_number": None},
+]
+
+
+def test_prefix_search_on_name_words_email_and_number():
+    """Test prefix matches on every indexed key"""
+    index = UserPrefixIndex(USERS)
+    assert [u["id"] for u in index.search("a")] == ["1", "2"]
+    assert [u["id"] for u in index.search("hop")] == ["3"]
+    assert [u["id"] for u in index.search("grace@")] == ["3"]
+    assert index.search("mem001") == [{"id": "2", "name": "Alan Turing", "number": "MEM001", "role": "mentor"}]
+
+
+def test_search_filters_by_role_and_limit():
+    """Test role filtering and result limit"""
+    index = UserPrefixIndex(USERS)
+    assert [u["id"] for u in index.search("mn", role="mentee")] == ["1", "3"]
+    assert index.search("mn", role="mentor") == []
+    assert len(index.search("mn", limit=1)) == 1
+
+
+def test_add_and_remove():
+    """Test incremental updates"""
+    index = UserPrefixIndex(USERS)
+    index.add({"id": "4", "name": "Adele Goldberg", "email": "adele@example.com", "role": "mentor", "membership_number": "MEM002"})
+    assert [u["id"] for u in index.search("ad")] == ["1", "4"]
+    index.remove("1")
+    assert [u["id"] for u in index.search("ad")] == ["4"]
+    assert len(index) == 3